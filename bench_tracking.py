@@ -0,0 +1,235 @@
+import argparse
+import itertools
+import json
+import os
+import time
+import cv2
+import numpy as np
+import config
+import camera
+import tracking
+import actions
+import gestures
+import profiler
+import input_backend
+import frame_sources
+
+# Repeatable hand-tracking benchmark over recorded clips.
+# Every clip runs through the real tracking.process_frame (flip, motion gate, ROI,
+# MediaPipe, filters, gestures, actions) with input injection going to a recording
+# backend, once per combination of preview/headless, RESOLUTION_ID and MODEL_COMPLEXITY.
+#   python bench_tracking.py clips/pinch.mp4 clips/hover/ --json tracking.json
+# Clips are video files or directories of images. Frames are resized to the resolution
+# under test, as the camera would deliver them.
+
+# --- SETTINGS ---
+STATIONARY_FRAMES = 15      # Window length for the jitter measurement
+STATIONARY_PX = 20.0        # A window counts as stationary if the raw fingertip stays within this box
+IMAGE_FPS = 30.0            # Frame rate assumed for image directories
+
+# --- INJECTION STUB ---
+class TimedRecordingBackend(input_backend.RecordingBackend):
+    """Recording backend that also keeps when each commit happened."""
+    name = "bench"
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def commit(self, kinds, xs, ys, count):
+        super().commit(kinds, xs, ys, count)
+        self.times.append(time.perf_counter())
+
+def is_click(events):
+    """True if a committed frame presses the button or puts touch contact 0 down."""
+    for ev in events:
+        if ev[0] == "button" and ev[1] == 1:
+            return True
+        if ev[0] == "touch" and ev[1] == 0 and ev[2] & input_backend.touch_engine.POINTER_FLAG_DOWN:
+            return True
+    return False
+
+# --- STATS ---
+def spread(values):
+    if not values:
+        return {}
+    p = np.percentile(values, [50, 90, 95])
+    return {"mean": round(float(np.mean(values)), 2), "p50": round(float(p[0]), 2),
+            "p90": round(float(p[1]), 2), "p95": round(float(p[2]), 2),
+            "max": round(float(np.max(values)), 2)}
+
+def jitter(raw, filtered):
+    """
+    Cursor jitter: std of plocX/plocY inside windows where the raw fingertip held still.
+    raw / filtered: (n, 2) screen positions of consecutive frames with a hand.
+    """
+    if len(raw) < STATIONARY_FRAMES:
+        return {"windows": 0}
+    raw_win = np.lib.stride_tricks.sliding_window_view(raw, STATIONARY_FRAMES, axis=0)
+    out_win = np.lib.stride_tricks.sliding_window_view(filtered, STATIONARY_FRAMES, axis=0)
+    still = (np.ptp(raw_win, axis=2) < STATIONARY_PX).all(axis=1)
+    if not still.any():
+        return {"windows": 0}
+    raw_std = raw_win[still].std(axis=2).mean(axis=0)
+    out_std = out_win[still].std(axis=2).mean(axis=0)
+    return {"windows": int(still.sum()),
+            "std_x": round(float(out_std[0]), 3), "std_y": round(float(out_std[1]), 3),
+            "raw_std_x": round(float(raw_std[0]), 3), "raw_std_y": round(float(raw_std[1]), 3)}
+
+# --- ONE RUN ---
+def open_clip(path, pacing):
+    if os.path.isdir(path):
+        return frame_sources.ImageSequenceSource(path, fps=IMAGE_FPS, pacing=pacing)
+    return frame_sources.VideoFileSource(path, pacing=pacing)
+
+def run(clip, preview, res_id, complexity, args, window):
+    width, height = camera.RESOLUTIONS.get(res_id, (640, 480))
+    config.headless_mode = not preview
+    tracking.init_hand_tracking(complexity)
+    recorder = TimedRecordingBackend()
+    input_backend.set_backend(recorder)
+    tracking.reset_pipeline()
+    profiler.enable(True)
+    profiler.reset()
+
+    source = open_clip(clip, frame_sources.PACING_FAST if args.fast else frame_sources.PACING_REALTIME)
+    pinch = gestures.C["pinch_close"]
+    frame_ms, cpu_ms = [], []
+    raw_pts, out_pts = [], []
+    click_ms = []
+    onset = None            # Capture time of the first frame of the current pinch
+    was_pinching = False
+    hand_frames = 0
+    frames = 0
+
+    wall0 = time.perf_counter()
+    while args.frames <= 0 or frames < args.frames:
+        success, img = source.read()
+        if not success:
+            if source.finished:
+                break
+            continue
+        captured = time.perf_counter()
+        if img.shape[1] != width or img.shape[0] != height:
+            img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+
+        commits = len(recorder.times)
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        with profiler.span("frame"):
+            display = tracking.process_frame(img, captured)
+        if window[0] and display is not None:
+            try:
+                cv2.imshow("Tracking Benchmark", display)
+                cv2.waitKey(1)
+            except cv2.error:
+                print("[Bench] No display available, preview runs draw overlays only")
+                window[0] = False
+        frame_ms.append((time.perf_counter() - t0) * 1000.0)
+        cpu_ms.append((time.process_time() - cpu0) * 1000.0)
+        frames += 1
+
+        # Click latency: first pinch frame captured -> button / touch-down committed
+        pinching = bool(gestures.conditions[pinch])
+        if pinching and not was_pinching:
+            onset = captured
+        was_pinching = pinching
+        for k in range(commits, len(recorder.times)):
+            if onset is not None and is_click(recorder.frames[k]):
+                click_ms.append((recorder.times[k] - onset) * 1000.0)
+                onset = None
+
+        if config.hand_detected:
+            hand_frames += 1
+            raw_pts.append((float(tracking.screen_pts[0, 0]), float(tracking.screen_pts[0, 1])))
+            out_pts.append((float(config.plocX), float(config.plocY)))
+        elif raw_pts and raw_pts[-1] is not None:
+            raw_pts.append(None)        # Hand lost: stationary windows never span the gap
+            out_pts.append(None)
+    wall_s = time.perf_counter() - wall0
+    source.release()
+    tracking.reset_pipeline()
+
+    # Jitter per continuous hand segment
+    segments, seg_raw, seg_out = [], [], []
+    for r, o in zip(raw_pts + [None], out_pts + [None]):
+        if r is None:
+            if seg_raw:
+                segments.append((np.array(seg_raw), np.array(seg_out)))
+            seg_raw, seg_out = [], []
+        else:
+            seg_raw.append(r)
+            seg_out.append(o)
+    windows = [jitter(r, o) for r, o in segments]
+    windows = [w for w in windows if w["windows"]]
+    total = sum(w["windows"] for w in windows)
+    jit = {"windows": total}
+    if total:
+        for key in ("std_x", "std_y", "raw_std_x", "raw_std_y"):
+            jit[key] = round(sum(w[key] * w["windows"] for w in windows) / total, 3)
+
+    stages = {name: {"mean_ms": round(s["mean_ms"], 3), "p50_ms": round(s["p50_ms"], 3),
+                     "p95_ms": round(s["p95_ms"], 3), "max_ms": round(s["max_ms"], 3)}
+              for name, s in profiler.summary().items()}
+    busy_s = sum(frame_ms) / 1000.0
+    return {
+        "clip": clip,
+        "mode": "preview" if preview else "headless",
+        "resolution_id": res_id,
+        "resolution": [width, height],
+        "model_complexity": complexity,
+        "pacing": "fast" if args.fast else "realtime",
+        "frames": frames,
+        "hand_frames": hand_frames,
+        "fps": round(frames / wall_s, 2) if wall_s else 0.0,
+        "capacity_fps": round(frames / busy_s, 2) if busy_s else 0.0,
+        "frame_ms": spread(frame_ms),
+        "cpu_ms_per_frame": spread(cpu_ms),
+        "cpu_pct": round(100.0 * sum(cpu_ms) / 1000.0 / wall_s, 1) if wall_s else 0.0,
+        "stages": stages,
+        "jitter_px": jit,
+        "clicks": len(click_ms),
+        "click_latency_ms": spread(click_ms),
+    }
+
+# --- DRIVER ---
+def int_list(text):
+    return [int(v) for v in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Hand-tracking throughput / jitter benchmark over recorded clips")
+    parser.add_argument("clips", nargs="+", help="Video files or image directories")
+    parser.add_argument("--modes", default="headless,preview", help="headless, preview or both")
+    parser.add_argument("--res", type=int_list, default=[0, 1], help="RESOLUTION_IDs to test")
+    parser.add_argument("--complexity", type=int_list, default=[0, 1], help="MODEL_COMPLEXITY values to test")
+    parser.add_argument("--frames", type=int, default=0, help="Stop each run after this many frames (0 = whole clip)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Feed frames as fast as tracking takes them (gesture hold times then run on compute time)")
+    parser.add_argument("--no-window", action="store_true", help="Preview mode draws overlays but opens no window")
+    parser.add_argument("--json", help="Write every run to this file")
+    args = parser.parse_args()
+
+    actions.toggle_keyboard = lambda: None  # A held pinky in a clip must not pop up the real keyboard
+    window = [not args.no_window]
+    modes = [m.strip() for m in args.modes.split(",")]
+    reports = []
+    for clip, mode, res_id, complexity in itertools.product(args.clips, modes, args.res, args.complexity):
+        print(f"[Bench] {clip} | {mode} | res {res_id} | complexity {complexity}")
+        r = run(clip, mode == "preview", res_id, complexity, args, window)
+        reports.append(r)
+        lat = r["click_latency_ms"].get("p50", "-")
+        print(f"[Bench]   {r['fps']} fps (capacity {r['capacity_fps']}), {r['frame_ms'].get('mean', '-')} ms/frame, "
+              f"CPU {r['cpu_pct']}%, jitter {r['jitter_px'].get('std_x', '-')}/{r['jitter_px'].get('std_y', '-')} px, "
+              f"{r['clicks']} clicks p50 {lat} ms")
+    tracking.close_hand_tracking()
+    if window[0]:
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"[Bench] Wrote {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import wave
+import numpy as np
+
+# Offline dictation benchmark: a directory of WAV files (each with a same-named .txt
+# reference transcript) is played through the real voice pipeline - ring, pre-gate,
+# VAD state machine, decode stage, text output - in place of the microphone. Typed text
+# lands in a recording text backend instead of the focused window.
+#   python bench_voice.py corpus/ --config tiny.en,int8,2,5 --config base.en,int8,4,5 --json out.json
+# Each configuration (MODEL_SIZE, COMPUTE_TYPE, cpu_threads, beam_size) runs in its own
+# child process, so CPU time and peak RSS are not polluted by the previous model.
+
+# --- SETTINGS ---
+GAP_MS = 2500               # Silence after each file (longer than the largest silence timeout)
+SETTLE_TIMEOUT_S = 60       # Give up waiting for a file's text after this long
+SETTLE_FRAMES = 5           # Pipeline must look idle this many frames in a row before the next file
+SPEECH_END_RATIO = 0.1      # Speech ends at the last frame above this fraction of the loudest frame
+RSS_POLL_S = 0.1
+RESULT_TAG = "BENCH_RESULT "
+
+# --- CORPUS ---
+def read_wav(path, rate):
+    """WAV -> mono int16 at `rate` (linear resampling when the file differs)."""
+    with wave.open(path, "rb") as w:
+        channels, width, file_rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: only 16-bit PCM is supported")
+    audio = np.frombuffer(raw, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+    if file_rate != rate:
+        n = int(len(audio) * rate / file_rate)
+        audio = np.interp(np.arange(n) * (file_rate / rate), np.arange(len(audio)), audio)
+    return audio.astype(np.int16)
+
+def load_corpus(directory, rate):
+    items = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        path = os.path.join(directory, name)
+        ref_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(ref_path):
+            with open(ref_path, encoding="utf-8") as f:
+                reference = f.read().strip()
+        items.append({"name": name, "audio": read_wav(path, rate), "reference": reference})
+    return items
+
+def speech_end_sample(audio, frame):
+    """Sample index where the last loud frame ends (trailing silence in the file is not speech)."""
+    n = len(audio) // frame
+    if n == 0:
+        return len(audio)
+    rms = np.sqrt(np.mean(audio[:n * frame].reshape(n, frame).astype(np.float32) ** 2, axis=1))
+    loud = np.nonzero(rms > rms.max() * SPEECH_END_RATIO)[0]
+    return (int(loud[-1]) + 1) * frame if len(loud) else len(audio)
+
+# --- WORD ERROR RATE ---
+def normalize_words(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+def word_errors(reference, hypothesis):
+    """Levenshtein distance over words (substitutions + deletions + insertions)."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+# --- FILE-BACKED MICROPHONE ---
+class FileInputStream:
+    """
+    Stand-in for sd.RawInputStream: a thread calls the audio callback with FRAME_SIZE
+    blocks of the corpus at `speed` x real time, then silence until the pipeline settles.
+    """
+    player = None           # The Player driving the stream (set before voice starts)
+
+    def __init__(self, samplerate, blocksize, dtype, channels, callback):
+        self.blocksize = blocksize
+        self.callback = callback
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=FileInputStream.player.run, args=(self,),
+                                        name="BenchFeeder", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class Player:
+    def __init__(self, voice, corpus, speed):
+        self.voice = voice
+        self.corpus = corpus
+        self.speed = speed
+        self.typed = []                 # (perf_counter, text) from the text backend
+        self.results = []
+        self.done = threading.Event()
+        self._silence = np.zeros(voice.FRAME_SIZE, dtype=np.int16)
+        self._next = None
+
+    def _push(self, stream, block):
+        stream.callback(block.tobytes(), len(block), None, None)
+        if self._next is None:
+            self._next = time.perf_counter()
+        self._next += len(block) / self.voice.SAMPLE_RATE / self.speed
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _push_audio(self, stream, audio):
+        frame = self.voice.FRAME_SIZE
+        for i in range(0, len(audio) - frame + 1, frame):
+            self._push(stream, audio[i:i + frame])
+
+    def _settled(self):
+        v = self.voice
+        # model_lock is held for the whole decode of a job already taken off the queue
+        return not v.recording and v.backlog() == 0 and not v.model_lock.locked()
+
+    def run(self, stream):
+        v = self.voice
+        # Mic noise while the model loads and warms up (also calibrates the pre-gate)
+        while not v.model_ready.is_set():
+            self._push(stream, self._silence)
+        self._push_audio(stream, np.zeros(v.SAMPLE_RATE, dtype=np.int16))
+
+        for item in self.corpus:
+            first_typed = len(self.typed)
+            audio = item["audio"]
+            end = speech_end_sample(audio, v.FRAME_SIZE)
+            self._push_audio(stream, audio[:end])
+            speech_end = time.perf_counter()
+            self._push_audio(stream, audio[end:])
+            self._push_audio(stream, np.zeros(int(v.SAMPLE_RATE * GAP_MS / 1000), dtype=np.int16))
+
+            deadline = time.perf_counter() + SETTLE_TIMEOUT_S
+            quiet = 0
+            while quiet < SETTLE_FRAMES and time.perf_counter() < deadline:
+                self._push(stream, self._silence)
+                quiet = quiet + 1 if self._settled() else 0
+
+            typed = self.typed[first_typed:]
+            text = "".join(t for _, t in typed).strip()
+            result = {"name": item["name"], "seconds": round(len(audio) / v.SAMPLE_RATE, 2),
+                      "text": text, "latency_ms": None}
+            if typed:
+                result["latency_ms"] = round((typed[-1][0] - speech_end) * 1000.0, 1)
+            if item["reference"] is not None:
+                result["errors"], result["ref_words"] = word_errors(item["reference"], text)
+            self.results.append(result)
+            print(f"[Bench] {item['name']}: {result['latency_ms']} ms | {text!r}")
+        self.done.set()
+
+# --- ONE CONFIGURATION (child process) ---
+def percentiles(values):
+    if not values:
+        return {}
+    p = np.percentile(values, [50, 90, 99])
+    return {"p50": round(float(p[0]), 1), "p90": round(float(p[1]), 1),
+            "p99": round(float(p[2]), 1), "max": round(float(max(values)), 1)}
+
+def run_config(args, spec):
+    import config
+    import voice
+    import text_output
+
+    class TimedTextBackend(text_output.RecordingTextBackend):
+        """Recording text backend that also keeps when each string was injected."""
+        def __init__(self, typed):
+            super().__init__()
+            self.typed = typed
+        def type(self, text):
+            self.typed.append((time.perf_counter(), text))
+        def paste(self, text):
+            self.type(text)
+            return True
+
+    model_size, compute_type, threads, beam = spec
+    voice.MODEL_SIZE, voice.COMPUTE_TYPE = model_size, compute_type
+    voice.CPU_THREADS, voice.BEAM_SIZE = int(threads), int(beam)
+    config.voice_enabled = True
+    config.VOICE_ALWAYS_ON = True
+    config.VOICE_STREAMING = args.streaming
+    config.VOICE_IDLE_UNLOAD_S = 0
+
+    corpus = load_corpus(args.corpus, voice.SAMPLE_RATE)
+    if not corpus:
+        raise SystemExit(f"[Bench] No .wav files in {args.corpus}")
+    player = Player(voice, corpus, args.speed)
+    FileInputStream.player = player
+    voice.sd.RawInputStream = FileInputStream
+    text_output.set_backend(TimedTextBackend(player.typed))
+
+    peak_rss = [0.0]
+    def watch_rss():
+        while not player.done.is_set():
+            peak_rss[0] = max(peak_rss[0], voice.process_rss_mb() or 0.0)
+            time.sleep(RSS_POLL_S)
+    threading.Thread(target=watch_rss, daemon=True).start()
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    voice.start_voice_thread()
+    player.done.wait()
+    cpu_s, wall_s = time.process_time() - cpu0, time.perf_counter() - wall0
+
+    latencies = [r["latency_ms"] for r in player.results if r["latency_ms"] is not None]
+    scored = [r for r in player.results if "errors" in r]
+    ref_words = sum(r["ref_words"] for r in scored)
+    stats = voice.get_stats()
+    return {
+        "config": {"model": model_size, "compute_type": compute_type,
+                   "cpu_threads": int(threads), "beam_size": int(beam),
+                   "streaming": args.streaming, "speed": args.speed},
+        "files": len(player.results),
+        "missed": len(player.results) - len(latencies),
+        "latency_ms": percentiles(latencies),
+        "rtf": stats["rtf"],
+        "wer": round(sum(r["errors"] for r in scored) / ref_words, 4) if ref_words else None,
+        "cpu_s": round(cpu_s, 2),
+        "cpu_per_audio_s": round(cpu_s / max(stats["audio_s"], 1e-9), 3),
+        "wall_s": round(wall_s, 1),
+        "peak_rss_mb": round(peak_rss[0], 1),
+        "model": dict(config.voice_model_timing),
+        "decode": stats,
+        "results": player.results,
+    }
+
+# --- DRIVER ---
+def parse_config(text):
+    parts = text.split(",")
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("expected MODEL_SIZE,COMPUTE_TYPE,cpu_threads,beam_size")
+    return parts
+
+def run_child(args, spec):
+    cmd = [sys.executable, os.path.abspath(__file__), args.corpus, "--child", ",".join(spec),
+           "--speed", str(args.speed)]
+    if args.streaming:
+        cmd.append("--streaming")
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_TAG):
+            return json.loads(line[len(RESULT_TAG):])
+        if args.verbose:
+            print(line)
+    print(f"[Bench] {','.join(spec)} failed (exit {proc.returncode})")
+    return None
+
+def print_summary(reports):
+    print(f"{'config':<28}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'RTF':>8}{'WER':>8}{'CPU s':>8}{'RSS MB':>9}")
+    for r in reports:
+        c, lat = r["config"], r["latency_ms"]
+        name = f"{c['model']},{c['compute_type']},{c['cpu_threads']},{c['beam_size']}"
+        wer = f"{r['wer']:.3f}" if r["wer"] is not None else "-"
+        print(f"{name:<28}{lat.get('p50', '-'):>9}{lat.get('p90', '-'):>9}{lat.get('p99', '-'):>9}"
+              f"{r['rtf']:>8}{wer:>8}{r['cpu_s']:>8}{r['peak_rss_mb']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline dictation benchmark over a WAV corpus")
+    parser.add_argument("corpus", help="Directory of .wav files with same-named .txt references")
+    parser.add_argument("--config", action="append", type=parse_config, default=[],
+                        help="MODEL_SIZE,COMPUTE_TYPE,cpu_threads,beam_size (repeatable)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Playback speed; latency is only meaningful at 1.0")
+    parser.add_argument("--streaming", action="store_true", help="Benchmark VOICE_STREAMING mode")
+    parser.add_argument("--json", help="Write every report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own log")
+    parser.add_argument("--child", type=parse_config, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_TAG + json.dumps(run_config(args, args.child)), flush=True)
+        os._exit(0)     # Voice threads are daemons blocked on the ring
+
+    configs = args.config
+    if not configs:
+        import voice
+        configs = [[voice.MODEL_SIZE, voice.COMPUTE_TYPE, str(voice.CPU_THREADS), str(voice.BEAM_SIZE)]]
+    reports = []
+    for spec in configs:
+        print(f"[Bench] Running {','.join(spec)} ...")
+        report = run_child(args, spec)
+        if report is not None:
+            reports.append(report)
+    print_summary(reports)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"[Bench] Wrote {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 import cv2
+import threading
+import time
 import config
+import frame_sources
+import profiler
 
 # --- GLOBALS ---
 cap = None
@@ -10,39 +14,151 @@ RESOLUTIONS = {
     1: (1280, 720)   # High Res (Better Tracking)
 }
 
+# --- CAPTURE THREAD ---
+# 3 slots = one being written, one published (latest), one held by the consumer.
+# The grabber never has to wait for the AI thread and never overwrites the frame in use.
+RING_SIZE = 3
+
+capture_thread = None
+capture_stop = threading.Event()
+ring = None
+
+# Minimum seconds between grabs (0 = as fast as the driver delivers). Set by the governor.
+capture_interval = 0.0
+
+# Metadata of the frame last returned by read_frame()
+last_frame_seq = 0
+last_frame_time = 0.0
+
+class FrameRing:
+    """
+    Latest-frame-wins ring of preallocated frame buffers.
+    The capture thread writes into free slots, the consumer always takes the newest one.
+    Frames that get overwritten before anyone reads them are counted as dropped.
+    """
+    def __init__(self, size=RING_SIZE, lossless=False):
+        self.size = size
+        self.lossless = lossless         # Replay at full speed: wait for the consumer instead of dropping
+        self.buffers = [None] * size     # Allocated lazily on the first frame (shape comes from the driver)
+        self.seqs = [0] * size
+        self.stamps = [0.0] * size
+        self.latest = -1                 # Slot holding the newest published frame
+        self.reading = -1                # Slot currently lent to the consumer
+        self.latest_consumed = True
+        self.seq = 0
+        self.captured = 0
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def acquire_write(self):
+        """Returns a slot that is neither published nor lent out."""
+        with self.cond:
+            if self.lossless:
+                self.cond.wait_for(lambda: self.latest_consumed or capture_stop.is_set())
+            for i in range(self.size):
+                if i != self.latest and i != self.reading:
+                    return i
+        return 0
+
+    def publish(self, slot, img, timestamp):
+        with self.cond:
+            self.seq += 1
+            self.buffers[slot] = img
+            self.seqs[slot] = self.seq
+            self.stamps[slot] = timestamp
+            self.captured += 1
+            if not self.latest_consumed:
+                self.dropped += 1
+            self.latest = slot
+            self.latest_consumed = False
+            self.cond.notify_all()
+
+    def get_latest(self, timeout=1.0):
+        """
+        Blocks until a frame newer than the last one handed out exists.
+        Returns (img, seq, timestamp) or (None, 0, 0.0) on timeout.
+        """
+        with self.cond:
+            if self.latest_consumed:
+                self.cond.wait_for(lambda: not self.latest_consumed, timeout)
+            if self.latest_consumed or self.latest < 0:
+                return None, 0, 0.0
+            # Lending the new slot implicitly gives the previous one back to the writer
+            self.reading = self.latest
+            self.latest_consumed = True
+            self.cond.notify_all()
+            slot = self.reading
+            return self.buffers[slot], self.seqs[slot], self.stamps[slot]
+
+    def wake(self):
+        with self.cond:
+            self.cond.notify_all()
+
+def _capture_loop(local_cap, local_ring):
+    """Grabs frames as fast as the driver delivers them (or at capture_interval)."""
+    next_due = 0.0
+    while not capture_stop.is_set():
+        if capture_interval > 0:
+            delay = next_due - time.perf_counter()
+            if delay > 0 and capture_stop.wait(delay):
+                break
+            next_due = time.perf_counter() + capture_interval
+        slot = local_ring.acquire_write()
+        # Passing the old buffer lets OpenCV decode in place when the shape matches
+        t0 = time.perf_counter()
+        success, img = local_cap.read(local_ring.buffers[slot])
+        timestamp = time.perf_counter()
+        profiler.add("capture", t0, timestamp)
+        if not success or img is None:
+            if getattr(local_cap, 'finished', False):
+                break
+            time.sleep(0.01)
+            continue
+        local_ring.publish(slot, img, timestamp)
+
+def start_capture_thread():
+    global capture_thread, ring
+    stop_capture_thread()
+    ring = FrameRing(lossless=getattr(cap, 'lossless', False))
+    capture_stop.clear()
+    capture_thread = threading.Thread(target=_capture_loop, args=(cap, ring), daemon=True)
+    capture_thread.start()
+
+def stop_capture_thread():
+    global capture_thread
+    capture_stop.set()
+    if ring is not None:
+        ring.wake()
+    if capture_thread is not None:
+        capture_thread.join(timeout=2.0)
+        capture_thread = None
+
+def set_capture_rate(fps):
+    """Throttles the capture thread. fps <= 0 restores full driver rate."""
+    global capture_interval
+    capture_interval = (1.0 / fps) if fps and fps > 0 else 0.0
+
+def get_capture_stats():
+    """Returns counters for the overlay / logs."""
+    if ring is None:
+        return {"captured": 0, "dropped": 0, "seq": 0}
+    return {"captured": ring.captured, "dropped": ring.dropped, "seq": ring.seq}
+
 def init_camera(res_id=0):
     global cap
     if cap is not None:
-        cap.release()
-    
-    # Force DirectShow (Standard for Windows)
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    
-    # --- 1. MJPG COMPRESSION ---
-    if config.USE_MJPG:
-        try:
-            fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-            cap.set(cv2.CAP_PROP_FOURCC, fourcc)
-            print("[Camera] MJPG Compression ENABLED")
-        except:
-            print("[Camera] Warning: MJPG not supported.")
-    else:
-        print("[Camera] MJPG Compression DISABLED (Standard)")
-
-    # --- 2. RESOLUTION & FPS ---
-    width, height = RESOLUTIONS.get(res_id, (640, 480))
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-    
-    cap.set(cv2.CAP_PROP_FPS, config.CAMERA_FPS)
-    print(f"[Camera] Requested FPS: {config.CAMERA_FPS}")
+        release_camera()
 
-    # --- 3. EXPOSURE (Default to Auto) ---
-    # We now rely on the user opening the Settings Panel to fix Low Light Comp
-    cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.75) # Auto
+    # Live device by default; video / image / synthetic replay for headless runs
+    width, height = RESOLUTIONS.get(res_id, (640, 480))
+    cap = frame_sources.create_source(width, height)
 
     if not cap.isOpened():
         print("Error: Could not open camera.")
+        return
+
+    # Start grabbing in the background
+    start_capture_thread()
 
 def open_settings_panel():
     """Opens the Windows Native Camera Settings Dialog"""
@@ -52,18 +168,36 @@ def open_settings_panel():
         cap.set(cv2.CAP_PROP_SETTINGS, 1)
 
 def read_frame():
-    global cap
-    if cap is None or not cap.isOpened():
+    """
+    Returns the newest captured frame. Older frames that were never read are dropped.
+    The returned image stays valid until the next call.
+    """
+    global last_frame_seq, last_frame_time
+    if cap is None or not cap.isOpened() or ring is None:
+        return False, None
+    img, seq, timestamp = ring.get_latest(timeout=1.0)
+    if img is None:
         return False, None
-    success, img = cap.read()
-    return success, img
+    last_frame_seq = seq
+    last_frame_time = timestamp
+    return True, img
+
+def is_source_finished():
+    """True once a replay source has delivered its last frame and it was consumed."""
+    if not getattr(cap, 'finished', False):
+        return False
+    return ring is None or ring.latest_consumed
 
 def is_camera_active():
     global cap
     return cap is not None and cap.isOpened()
 
 def release_camera():
-    global cap
+    global cap, ring
+    stop_capture_thread()
     if cap is not None:
+        stats = get_capture_stats()
+        print(f"[Camera] Captured {stats['captured']} frames, dropped {stats['dropped']} stale")
         cap.release()
-        cap = None
\ No newline at end of file
+        cap = None
+    ring = None
@@ -1,41 +1,216 @@
-import pyautogui
 import json
 import os
-
-# --- CRITICAL PERFORMANCE SETTINGS ---
-pyautogui.PAUSE = 0
-pyautogui.FAILSAFE = False
+import sys
+import threading
+import types
+import events
 
 # --- CONSTANTS ---
 SETTINGS_FILE = "settings.json"
+SAVE_DEBOUNCE_S = 0.5      # save_settings() calls within this window become one write
+RELOAD_POLL_S = 1.0        # settings.json mtime check interval for hot reload
+SCREEN_FALLBACK = (1920, 1080)  # Screen size until (or unless) the input backend reports one
+
+# --- SETTINGS STORE ---
+# Every tunable is declared once here as name: (type, default). The values live in an
+# immutable Settings object with __slots__; config.NAME reads and writes keep working
+# (they go through properties on this module), but every write builds a new object and
+# swaps it in. snapshot() hands out the current object, so a frame reads one consistent
+# set of settings with plain slot lookups and never sees half of a GUI update.
+FIELDS = {
+    # --- DEFAULT USER SETTINGS ---
+    "AUTO_START": (bool, True),
+    "HEADLESS_DEFAULT": (bool, True),
+    "AUDIO_START": (bool, False),
+    "RESOLUTION_ID": (int, 0),
+    "MODEL_COMPLEXITY": (int, 0),
+    "SENSITIVITY": (int, 90),
+    "SMOOTHING": (float, 4.0),
+    "CLICK_DIST": (int, 27),
+    "RELEASE_DIST": (int, 40),
+    "DEPTH_SCALE": (float, 0.8),
+    "CAMERA_FPS": (int, 30),
+    "USE_MJPG": (bool, False),
+    "AUTO_EXPOSURE": (bool, True),
+    "EXPOSURE_VAL": (int, -3),
+    "GAIN_VAL": (int, 64),
+    "BOX_OFFSET_X": (int, 0),                    # Horizontal Shift
+    "BOX_OFFSET_Y": (int, 0),                    # Vertical Shift
+    "ROI_TRACKING": (bool, False),               # Run the hand model on a crop around the last hand instead of the full frame
+    "ROI_PADDING": (float, 0.35),                # Crop margin around the hand, as a fraction of the hand size (per side)
+    "VOICE_ALWAYS_ON": (bool, False),
+
+    # --- CURSOR FILTER ---
+    "CURSOR_FILTER": (str, "one_euro"),          # "one_euro", "kalman" or "legacy" (old per-frame step)
+    "ONE_EURO_MIN_CUTOFF": (float, 1.0),         # Hz at rest (lower = stiller cursor); scaled by SMOOTHING
+    "ONE_EURO_BETA": (float, 0.007),             # Cutoff increase per px/s of speed (higher = less lag on flicks)
+    "KALMAN_PROCESS_NOISE": (float, 20000.0),    # Acceleration variance (px^2/s^4); higher = follows flicks faster
+    "KALMAN_MEASUREMENT_NOISE": (float, 25.0),   # Landmark jitter variance (px^2)
+    "CURSOR_PREDICTION": (bool, False),          # Extrapolate by the measured capture->output latency
+    "CURSOR_PREDICT_MAX_MS": (int, 50),
+
+    # --- CURSOR OUTPUT THREAD ---
+    "CURSOR_OUTPUT_HZ": (int, 120),              # Pointer update rate between camera frames (0 = move only on frames)
+    "CURSOR_OUTPUT_MODE": (str, "interpolate"),  # "interpolate" (+1 frame lag, smoothest) or "extrapolate"
+    "CURSOR_EXTRAPOLATE_MAX": (float, 0.5),      # Max extrapolation, as a fraction of a frame period
+
+    # --- ACTION EXECUTOR ---
+    "ACTION_QUEUE_SIZE": (int, 32),              # Pending side effects (keyboard toggle, typing); extra ones are dropped
+
+    # --- INPUT INJECTION ---
+    "INPUT_BACKEND": (str, "auto"),              # "auto", "win32", "uinput", "x11", "recording" or "null"
+
+    # --- TEXT OUTPUT (dictation) ---
+    "TEXT_BACKEND": (str, "auto"),               # "auto", "win32", "pyautogui", "recording" or "null"
+    "TEXT_PASTE_MIN_CHARS": (int, 0),            # Paste text at least this long through the clipboard (0 = always type)
+    "TEXT_RATE_CPS": (float, 0),                 # Characters per second for apps that drop fast input (0 = all at once)
+    "TEXT_RATE_CHUNK": (int, 4),                 # Characters per send in rate-limited mode
+
+    # --- MOTION GATE ---
+    "MOTION_GATE": (bool, True),                 # Skip the hand model while no hand is tracked and the scene is static
+    "MOTION_GATE_THRESHOLD": (float, 0.01),      # Fraction of moving pixels (in/near the active box) that wakes inference
+    "MOTION_GATE_REFRESH": (float, 1.0),         # Seconds between forced inference runs on a static scene
+
+    # --- POWER GOVERNOR ---
+    # Inference / capture rates per activity state (0 = as fast as the camera delivers)
+    "GOV_IDLE_AFTER": (float, 2.0),              # Seconds without a hand before SEARCHING -> IDLE
+    "GOV_DEEP_IDLE_AFTER": (float, 120.0),       # Seconds without a hand before IDLE -> DEEP_IDLE
+    "GOV_ACTIVE_FPS": (float, 0),
+    "GOV_SEARCH_FPS": (float, 0),
+    "GOV_IDLE_FPS": (float, 10),
+    "GOV_DEEP_IDLE_FPS": (float, 2),
+    "GOV_IDLE_CAPTURE_FPS": (float, 15),
+    "GOV_DEEP_IDLE_CAPTURE_FPS": (float, 5),
+    "GOV_DEEP_IDLE_PARK_CAMERA": (bool, True),   # Release the camera in deep idle, reopening it briefly to probe
+    "GOV_PARK_SECONDS": (float, 3.0),
+    "GOV_PROBE_SECONDS": (float, 1.0),
+
+    # --- FRAME SOURCE ---
+    # "device" = webcam, "video" / "images" = replay FRAME_SOURCE_PATH, "synthetic" = generated frames
+    "FRAME_SOURCE": (str, "device"),
+    "FRAME_SOURCE_PATH": (str, ""),
+    "FRAME_SOURCE_PACING": (str, "realtime"),    # "realtime" or "fast" (as fast as tracking can consume)
+    "FRAME_SOURCE_LOOP": (bool, False),
+
+    # --- VOICE ---
+    "VOICE_STREAMING": (bool, False),            # Type words as they stabilize instead of after the whole utterance
+    "VOICE_IDLE_UNLOAD_S": (int, 180),           # Unload Whisper after this long unused with no hand in view (0 = never)
+    "VOICE_MEMORY_BUDGET_MB": (int, 0),          # Process RSS budget: over it, skip preloading and unload when idle (0 = off)
+    "VOICE_PRELOAD": (bool, True),               # Load Whisper ahead of time when a hand shows up or the voice gesture nears
+
+    # --- LANDMARK TRACE ---
+    "RECORD_LANDMARKS": (bool, False),           # Write every frame's landmarks + gesture flags to LANDMARK_TRACE_PATH (new file per session)
+    "LANDMARK_TRACE_PATH": (str, "landmarks.lmtrace"),
+
+    # --- PROFILING ---
+    "PROFILE_STAGES": (bool, False),             # Per-stage latency spans (capture, inference, actions, voice)
+    "PROFILE_TRACE_PATH": (str, "trace.json"),
+}
+
+# Always written to settings.json (other fields only once they differ from the default)
+PERSISTED = (
+    "SENSITIVITY", "SMOOTHING", "CLICK_DIST", "RELEASE_DIST", "DEPTH_SCALE",
+    "RESOLUTION_ID", "MODEL_COMPLEXITY", "HEADLESS_DEFAULT", "AUTO_START", "AUDIO_START",
+    "CAMERA_FPS", "USE_MJPG", "AUTO_EXPOSURE", "EXPOSURE_VAL", "BOX_OFFSET_X", "BOX_OFFSET_Y",
+    "VOICE_ALWAYS_ON", "VOICE_STREAMING", "VOICE_IDLE_UNLOAD_S", "VOICE_MEMORY_BUDGET_MB",
+    "VOICE_PRELOAD", "TEXT_PASTE_MIN_CHARS", "TEXT_RATE_CPS", "ROI_TRACKING", "ROI_PADDING",
+    "CURSOR_FILTER", "CURSOR_PREDICTION", "FRAME_SOURCE", "FRAME_SOURCE_PATH",
+    "FRAME_SOURCE_PACING", "FRAME_SOURCE_LOOP",
+)
+
+class Settings:
+    """One immutable, typed set of every FIELDS value."""
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, values):
+        for name in FIELDS:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are immutable, assign config.NAME or call config.update()")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+_BOOL_STRINGS = {"true": True, "false": False, "1": True, "0": False}
+
+def _coerce(name, value):
+    """value as the field's type. Raises for anything that isn't one (update() then skips it)."""
+    kind = FIELDS[name][0]
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        if isinstance(value, str) and value.strip().lower() in _BOOL_STRINGS:
+            # Hand-edited settings.json: "false" must not read as a non-empty (true) string
+            return _BOOL_STRINGS[value.strip().lower()]
+        raise ValueError(value)
+    if kind is str:
+        if not isinstance(value, str):
+            raise TypeError(value)
+        return value
+    if not isinstance(value, (int, float, str)):
+        raise TypeError(value)
+    if kind is int and not isinstance(value, int):
+        return int(round(float(value)))
+    return kind(value)
 
-# --- DEFAULT USER SETTINGS ---
-AUTO_START = True       
-HEADLESS_DEFAULT = True 
-AUDIO_START = False     
-RESOLUTION_ID = 0  
-MODEL_COMPLEXITY = 0 
-SENSITIVITY = 90
-SMOOTHING = 4.0
-CLICK_DIST = 27
-RELEASE_DIST = 40
-DEPTH_SCALE = 0.8
-CAMERA_FPS = 30  
-USE_MJPG = False 
-AUTO_EXPOSURE = True   
-EXPOSURE_VAL = -3
-GAIN_VAL = 64
-BOX_OFFSET_X = 0   # Horizontal Shift
-BOX_OFFSET_Y = 0   # Vertical Shift
+# --- STORE STATE ---
+_current = Settings({name: kind(default) for name, (kind, default) in FIELDS.items()})
+_store_lock = threading.Lock()
+_listeners = []             # (callback, frozenset of names or None)
+version = 0                 # Bumped on every change
+
+def snapshot():
+    """The current Settings object. Immutable: read it once per frame instead of config.X."""
+    return _current
+
+def update(values, source="set"):
+    """
+    Applies several settings in one swap and notifies listeners.
+    Unknown names and values of the wrong type are skipped. Returns the changed {name: value}.
+    """
+    global _current, version
+    with _store_lock:
+        merged = _current.to_dict()
+        changed = {}
+        for name, value in values.items():
+            if name not in FIELDS:
+                continue
+            try:
+                value = _coerce(name, value)
+            except (TypeError, ValueError, OverflowError):
+                print(f"[Config] Ignoring {name}={value!r} ({source}), expected {FIELDS[name][0].__name__}")
+                continue
+            if merged[name] != value:
+                merged[name] = changed[name] = value
+        if not changed:
+            return changed
+        _current = Settings(merged)
+        version += 1
+        listeners = list(_listeners)
+    for callback, names in listeners:
+        if names is None or not names.isdisjoint(changed):
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"[Config] Listener {getattr(callback, '__name__', callback)} failed: {e}")
+    return changed
+
+def subscribe(callback, names=None):
+    """callback(changed) runs on the writing thread after any of `names` (default: any setting) changes."""
+    with _store_lock:
+        _listeners.append((callback, frozenset(names) if names else None))
 
 # --- SYSTEM STATE ---
-running = False         
+running = False
 video_visible = False
-headless_mode = True    
+headless_mode = True
 hand_detected = False
 
 # --- MOUSE STATE ---
-wScr, hScr = pyautogui.size()
+wScr, hScr = SCREEN_FALLBACK   # input_backend.set_backend() replaces it with the real screen
 plocX, plocY = 0, 0
 clocX, clocY = 0, 0
 dragging = False
@@ -44,83 +219,115 @@ dragging = False
 right_clicked = False
 pinky_triggered = False
 keyboard_open = False
-voice_enabled = False       
-voice_active_gesture = False 
+voice_enabled = False
+voice_active_gesture = False
 voice_status = "IDLE"
-VOICE_ALWAYS_ON = False
+voice_model_timing = {}         # Whisper lifecycle timings (load / warm-up ms, loads, unloads)
 
 # --- PERSISTENCE LOGIC ---
+_save_timer = None
+_save_lock = threading.Lock()
+_own_mtime = None           # mtime of our last write, so the watcher doesn't reload it
+_watcher = None
+
+def _settings_data():
+    defaults = {name: default for name, (kind, default) in FIELDS.items()}
+    values = _current.to_dict()
+    data = {name: values[name] for name in PERSISTED}
+    # Fields set by hand (or pushed into the file) survive the rewrite
+    for name, value in values.items():
+        if name not in data and value != defaults[name]:
+            data[name] = value
+    data["voice_enabled"] = voice_enabled
+    return data
+
+def flush_settings():
+    """Writes settings.json now (atomically: temp file + rename), cancelling a pending debounce."""
+    global _save_timer, _own_mtime
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+            _save_timer = None
+        tmp = SETTINGS_FILE + ".tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(_settings_data(), f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, SETTINGS_FILE)
+            _own_mtime = os.stat(SETTINGS_FILE).st_mtime_ns
+            print("Configuration saved.")
+        except Exception as e:
+            print(f"Failed to save settings: {e}")
+
 def save_settings():
-    data = {
-        "SENSITIVITY": SENSITIVITY,
-        "SMOOTHING": SMOOTHING,
-        "CLICK_DIST": CLICK_DIST,
-        "RELEASE_DIST": RELEASE_DIST,
-        "DEPTH_SCALE": DEPTH_SCALE,
-        "RESOLUTION_ID": RESOLUTION_ID,
-        "MODEL_COMPLEXITY": MODEL_COMPLEXITY,
-        "HEADLESS_DEFAULT": HEADLESS_DEFAULT,
-        "AUTO_START": AUTO_START,
-        "AUDIO_START": AUDIO_START, 
-        "voice_enabled": voice_enabled,
-        "CAMERA_FPS": CAMERA_FPS,
-        # --- NEW PERSISTENT SETTINGS ---
-        "USE_MJPG": USE_MJPG,
-        "AUTO_EXPOSURE": AUTO_EXPOSURE,
-        "EXPOSURE_VAL": EXPOSURE_VAL,
-        "BOX_OFFSET_X": BOX_OFFSET_X,
-        "BOX_OFFSET_Y": BOX_OFFSET_Y,
-        "VOICE_ALWAYS_ON": VOICE_ALWAYS_ON
-    }
-    try:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
-        print("Configuration saved.")
-    except Exception as e:
-        print(f"Failed to save settings: {e}")
-
-def load_settings():
-    global SENSITIVITY, SMOOTHING, CLICK_DIST, RELEASE_DIST, DEPTH_SCALE
-    global RESOLUTION_ID, MODEL_COMPLEXITY, HEADLESS_DEFAULT, AUTO_START, AUDIO_START
-    global headless_mode, voice_enabled 
-    global CAMERA_FPS
-    # Import the new globals so we can write to them
-    global USE_MJPG, AUTO_EXPOSURE, EXPOSURE_VAL, BOX_OFFSET_X, BOX_OFFSET_Y
-    global BOX_OFFSET_X, BOX_OFFSET_Y
-    global VOICE_ALWAYS_ON
-    
+    """Schedules a write; bursts of saves (tray toggles, sliders) become one write."""
+    global _save_timer
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+        _save_timer = threading.Timer(SAVE_DEBOUNCE_S, flush_settings)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+def load_settings(initial=True):
+    """Reads settings.json into the store. initial=False is a hot reload: runtime state is left alone."""
+    global headless_mode, voice_enabled, _own_mtime
+
     if os.path.exists(SETTINGS_FILE):
         try:
+            _own_mtime = os.stat(SETTINGS_FILE).st_mtime_ns
             with open(SETTINGS_FILE, 'r') as f:
                 data = json.load(f)
-                
-            SENSITIVITY = data.get("SENSITIVITY", SENSITIVITY)
-            SMOOTHING = data.get("SMOOTHING", SMOOTHING)
-            CLICK_DIST = data.get("CLICK_DIST", CLICK_DIST)
-            RELEASE_DIST = data.get("RELEASE_DIST", RELEASE_DIST)
-            DEPTH_SCALE = data.get("DEPTH_SCALE", DEPTH_SCALE)
-            RESOLUTION_ID = data.get("RESOLUTION_ID", RESOLUTION_ID)
-            MODEL_COMPLEXITY = data.get("MODEL_COMPLEXITY", MODEL_COMPLEXITY)
-            HEADLESS_DEFAULT = data.get("HEADLESS_DEFAULT", HEADLESS_DEFAULT)
-            AUTO_START = data.get("AUTO_START", AUTO_START)
-            AUDIO_START = data.get("AUDIO_START", AUDIO_START)
-            CAMERA_FPS = data.get("CAMERA_FPS", CAMERA_FPS)
-            
-            # --- LOAD NEW SETTINGS ---
-            USE_MJPG = data.get("USE_MJPG", USE_MJPG)
-            AUTO_EXPOSURE = data.get("AUTO_EXPOSURE", AUTO_EXPOSURE)
-            EXPOSURE_VAL = data.get("EXPOSURE_VAL", EXPOSURE_VAL)
-            BOX_OFFSET_X = data.get("BOX_OFFSET_X", BOX_OFFSET_X)
-            BOX_OFFSET_Y = data.get("BOX_OFFSET_Y", BOX_OFFSET_Y)
-            
-            if AUDIO_START:
+
+            changed = update(data, source=SETTINGS_FILE)
+            if not initial:
+                if changed:
+                    print(f"[Config] Reloaded {SETTINGS_FILE}: {', '.join(sorted(changed))}")
+                return
+
+            if _current.AUDIO_START:
                 voice_enabled = True
             else:
                 voice_enabled = data.get("voice_enabled", False)
-            
-            headless_mode = HEADLESS_DEFAULT
+
+            headless_mode = _current.HEADLESS_DEFAULT
             print("Configuration loaded.")
         except Exception as e:
             print(f"Failed to load settings: {e}")
 
-load_settings()
\ No newline at end of file
+def _watch_settings():
+    # A plain file has nothing to block on, but exit still wakes the watcher at once
+    while not events.shutdown.wait(RELOAD_POLL_S):
+        try:
+            mtime = os.stat(SETTINGS_FILE).st_mtime_ns
+        except OSError:
+            continue
+        if mtime != _own_mtime:
+            load_settings(initial=False)
+
+def start_watcher():
+    """Hot reload: applies edits to settings.json (by hand or pushed) while running."""
+    global _watcher
+    if _watcher is None:
+        _watcher = threading.Thread(target=_watch_settings, name="ConfigWatcher", daemon=True)
+        _watcher.start()
+
+# --- config.NAME COMPATIBILITY ---
+# Module attribute access for FIELDS goes through the store; everything else
+# (runtime state like running / hand_detected) stays a plain module global.
+class _ConfigModule(types.ModuleType):
+    pass
+
+def _field_property(name):
+    def get(module):
+        return getattr(_current, name)
+    def put(module, value):
+        update({name: value})
+    return property(get, put)
+
+for _name in FIELDS:
+    setattr(_ConfigModule, _name, _field_property(_name))
+sys.modules[__name__].__class__ = _ConfigModule
+
+load_settings()
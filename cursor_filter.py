@@ -0,0 +1,138 @@
+import math
+import config
+
+# Timestamp-aware cursor filters. Every filter takes (x, y, t) with t in seconds
+# (perf_counter of the camera frame), so lag and jitter stay the same whether
+# tracking runs at 30 fps, 10 fps in idle, or stutters on a slow frame.
+#   "one_euro" - adaptive low-pass: heavy smoothing when still, light when moving fast
+#   "kalman"   - constant-velocity Kalman filter per axis
+#   "legacy"   - the original per-frame (x - ploc) / SMOOTHING step with a 2 px deadzone
+
+RESET_GAP = 0.5   # Seconds without a measurement after which a filter re-seeds instead of gliding
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.) on two axes."""
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self, x=None, y=None, t=None):
+        self.x, self.y, self.t = x, y, t
+        self.vx = self.vy = 0.0
+
+    def update(self, x, y, t):
+        if self.t is None or t - self.t > RESET_GAP:
+            self.reset(x, y, t)
+            return x, y
+        dt = t - self.t
+        if dt <= 0:
+            return self.x, self.y
+        self.t = t
+
+        # Smoothed speed drives the cutoff: slow = smooth, fast = responsive
+        a_d = _alpha(self.d_cutoff, dt)
+        self.vx += a_d * ((x - self.x) / dt - self.vx)
+        self.vy += a_d * ((y - self.y) / dt - self.vy)
+        speed = math.hypot(self.vx, self.vy)
+
+        a = _alpha(self.min_cutoff + self.beta * speed, dt)
+        self.x += a * (x - self.x)
+        self.y += a * (y - self.y)
+        return self.x, self.y
+
+    def predict(self, horizon):
+        return self.x + self.vx * horizon, self.y + self.vy * horizon
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter, independent x/y axes (state: position, velocity)."""
+    def __init__(self, process_noise=20000.0, measurement_noise=25.0):
+        self.q = process_noise          # Acceleration variance (px^2/s^4)
+        self.r = measurement_noise      # Landmark jitter variance (px^2)
+        self.reset()
+
+    def reset(self, x=None, y=None, t=None):
+        self.t = t
+        # Per axis: [pos, vel] and covariance [p00, p01, p11]
+        self.state = [[x or 0.0, 0.0], [y or 0.0, 0.0]]
+        self.cov = [[self.r, 0.0, 1e4], [self.r, 0.0, 1e4]]
+
+    @property
+    def x(self):
+        return self.state[0][0]
+
+    @property
+    def y(self):
+        return self.state[1][0]
+
+    def _step(self, axis, z, dt):
+        pos, vel = self.state[axis]
+        p00, p01, p11 = self.cov[axis]
+
+        # Predict
+        pos += vel * dt
+        dt2 = dt * dt
+        q = self.q
+        p00 += dt * (2 * p01 + dt * p11) + q * dt2 * dt2 / 4
+        p01 += dt * p11 + q * dt2 * dt / 2
+        p11 += q * dt2
+
+        # Update
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        innov = z - pos
+        pos += k0 * innov
+        vel += k1 * innov
+        self.state[axis] = [pos, vel]
+        self.cov[axis] = [(1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01]
+
+    def update(self, x, y, t):
+        if self.t is None or t - self.t > RESET_GAP:
+            self.reset(x, y, t)
+            return x, y
+        dt = t - self.t
+        if dt <= 0:
+            return self.x, self.y
+        self.t = t
+        self._step(0, x, dt)
+        self._step(1, y, dt)
+        return self.x, self.y
+
+    def predict(self, horizon):
+        return (self.state[0][0] + self.state[0][1] * horizon,
+                self.state[1][0] + self.state[1][1] * horizon)
+
+class LegacyFilter:
+    """The original frame-based exponential step, kept for comparison."""
+    def __init__(self, smoothing=4.0):
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self, x=None, y=None, t=None):
+        self.x = x if x is not None else 0.0
+        self.y = y if y is not None else 0.0
+
+    def update(self, x, y, t):
+        if (x - self.x)**2 + (y - self.y)**2 > 4.0:
+            self.x += (x - self.x) / self.smoothing
+            self.y += (y - self.y) / self.smoothing
+        return self.x, self.y
+
+    def predict(self, horizon):
+        return self.x, self.y
+
+def create_filter(kind=None):
+    """Builds the filter selected by config.CURSOR_FILTER, scaled by the SMOOTHING slider."""
+    kind = kind or config.CURSOR_FILTER
+    # SMOOTHING 4 (the default) maps to the base tuning; higher = smoother
+    strength = max(config.SMOOTHING, 1.0) / 4.0
+    if kind == "kalman":
+        return KalmanFilter(config.KALMAN_PROCESS_NOISE / strength, config.KALMAN_MEASUREMENT_NOISE * strength)
+    if kind == "legacy":
+        return LegacyFilter(config.SMOOTHING)
+    return OneEuroFilter(config.ONE_EURO_MIN_CUTOFF / strength, config.ONE_EURO_BETA)
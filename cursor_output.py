@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+import config
+
+# High-rate cursor output thread.
+# Tracking pushes one filtered index position per processed camera frame (15-30 Hz);
+# this thread moves the pointer at CURSOR_OUTPUT_HZ by interpolating between (or
+# extrapolating past) those samples. It only drives the hover pointer: clicks and
+# touch contacts are still applied by actions.handle_input on frame boundaries,
+# and the thread holds still while a contact is down.
+
+# --- STATE ---
+_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_thread = None
+_move = None                 # Callable(x, y) that actually positions the pointer
+
+# Samples are (x, y, frame timestamp, arrival time). The glide period is the spacing of
+# the frame timestamps, so processing-time jitter doesn't stretch or squeeze it; only
+# the time since the newest sample arrived is measured on the output clock.
+_prev = (0.0, 0.0, 0.0, 0.0)
+_last = (0.0, 0.0, 0.0, 0.0)
+_active = False              # False = hold (no hand / touch down), thread sleeps
+_out_x, _out_y = -1, -1      # Last position sent, to skip redundant moves
+
+running = False
+moves_sent = 0
+
+def push(x, y, timestamp=None):
+    """New filtered position from the tracking thread; timestamp = capture time of its frame."""
+    global _prev, _last, _active
+    now = time.perf_counter()
+    if timestamp is None:
+        timestamp = now
+    with _lock:
+        if _active:
+            _prev = _last
+        else:
+            # Coming out of a hold: don't glide from a stale position
+            _prev = (x, y, timestamp, now)
+        _last = (x, y, timestamp, now)
+        _active = True
+    _wake.set()
+
+def hold():
+    """Stop moving the pointer until the next push (touch down, hand lost)."""
+    global _active
+    with _lock:
+        _active = False
+
+def _target(now):
+    x0, y0, t0, _ = _prev
+    x1, y1, t1, a1 = _last
+    period = t1 - t0
+    if period <= 0:
+        return x1, y1
+    elapsed = now - a1
+    if config.CURSOR_OUTPUT_MODE == "extrapolate":
+        # Zero added latency; overshoot is capped to a fraction of a frame period
+        elapsed = min(elapsed, period * config.CURSOR_EXTRAPOLATE_MAX)
+        t = 1.0 + elapsed / period
+    else:
+        # Trail one frame period behind and glide from the previous sample to the newest
+        t = min(elapsed / period, 1.0)
+    return x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
+
+def _loop():
+    global _out_x, _out_y, moves_sent
+    next_time = time.perf_counter()
+    while not _stop.is_set():
+        if not _active:
+            # Zero CPU while nothing is tracked
+            _wake.wait()
+            _wake.clear()
+            next_time = time.perf_counter()
+            continue
+
+        interval = 1.0 / max(config.CURSOR_OUTPUT_HZ, 1)
+        now = time.perf_counter()
+        with _lock:
+            x, y = _target(now)
+        x = int(min(max(x, 0), config.wScr - 1))
+        y = int(min(max(y, 0), config.hScr - 1))
+        if (x, y) != (_out_x, _out_y) and _active:
+            try:
+                _move(x, y)
+                moves_sent += 1
+            except Exception:
+                pass
+            _out_x, _out_y = x, y
+
+        next_time += interval
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_time = time.perf_counter()
+
+def _set_timer_resolution(enable):
+    """Windows sleeps in 15.6 ms steps by default, too coarse for 60+ Hz."""
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+        if enable:
+            ctypes.windll.winmm.timeBeginPeriod(1)
+        else:
+            ctypes.windll.winmm.timeEndPeriod(1)
+    except Exception:
+        pass
+
+def start(move_func):
+    global _thread, _move, running
+    if running:
+        return
+    _move = move_func
+    _stop.clear()
+    _wake.clear()
+    hold()
+    _set_timer_resolution(True)
+    _thread = threading.Thread(target=_loop, daemon=True)
+    _thread.start()
+    running = True
+    print(f"[Cursor] Output thread started ({config.CURSOR_OUTPUT_HZ} Hz, {config.CURSOR_OUTPUT_MODE})")
+
+def stop():
+    global _thread, running
+    if not running:
+        return
+    running = False
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout=1.0)
+        _thread = None
+    _set_timer_resolution(False)
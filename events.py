@@ -0,0 +1,76 @@
+import threading
+
+# Thread coordination.
+# Producers publish a topic right after they change the state it stands for; waiting
+# threads block on one Condition until their predicate holds, so they wake the moment
+# something changes and burn no CPU while idle.
+#   config.running = True; events.publish(events.RUN)
+#   events.wait(lambda: config.running)          # main_loop while stopped
+# Topics:
+#   RUN      - tracking service started / stopped (config.running)
+#   VOICE    - voice engine switched (config.voice_enabled, VOICE_ALWAYS_ON) or new voice work
+#   GESTURE  - hand presence or a voice gesture (voice / voice_near) changed
+#   SHUTDOWN - the app is exiting; every wait returns at once
+
+RUN = "run"
+VOICE = "voice"
+GESTURE = "gesture"
+SHUTDOWN = "shutdown"
+TOPICS = (RUN, VOICE, GESTURE, SHUTDOWN)
+
+# --- STATE ---
+_cond = threading.Condition()
+_seq = dict.fromkeys(TOPICS, 0)      # Publish count per topic, lets waiters detect "anything new"
+_subscribers = {topic: [] for topic in TOPICS}
+shutdown = threading.Event()
+
+# --- METRICS ---
+published = dict.fromkeys(TOPICS, 0)
+
+def publish(topic):
+    """Wakes every waiter, then runs the topic's callbacks on the publishing thread."""
+    with _cond:
+        _seq[topic] += 1
+        published[topic] += 1
+        _cond.notify_all()
+        callbacks = list(_subscribers[topic])
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"[Events] {topic} callback failed: {e}")
+
+def subscribe(topic, callback):
+    """callback() runs after each publish of topic. Keep it short (schedule, set an Event)."""
+    with _cond:
+        _subscribers[topic].append(callback)
+
+def wait(predicate, timeout=None):
+    """
+    Blocks until predicate() is true, shutdown, or timeout. Returns predicate().
+    The predicate is re-checked only on a publish, so its state must have a topic.
+    """
+    with _cond:
+        _cond.wait_for(lambda: shutdown.is_set() or predicate(), timeout)
+    return predicate()
+
+def mark(topics=TOPICS):
+    """Current publish counts; pass to wait_change() to wait for anything after this point."""
+    with _cond:
+        return tuple(_seq[t] for t in topics)
+
+def wait_change(topics, since, timeout=None):
+    """Blocks until one of topics was published after mark() returned since. False on timeout."""
+    with _cond:
+        return _cond.wait_for(
+            lambda: shutdown.is_set() or any(_seq[t] != s for t, s in zip(topics, since)), timeout)
+
+def request_shutdown():
+    shutdown.set()
+    publish(SHUTDOWN)
+
+def shutting_down():
+    return shutdown.is_set()
+
+def get_stats():
+    return dict(published)
@@ -0,0 +1,151 @@
+import threading
+import queue
+import time
+import config
+import profiler
+
+# Background executor for slow side effects (keyboard toggle, typing, service restarts).
+# The camera and voice threads only enqueue; one worker thread runs the actions strictly
+# in submission order, so a stalled PowerShell pipe or a long string of keystrokes never
+# shows up as a dropped frame.
+#   executor.submit("keyboard", keyboard.toggle, coalesce=TOGGLE)
+# Coalescing (per key, only while the action is still waiting in the queue):
+#   TOGGLE - a second toggle cancels the pending one (two toggles = no-op)
+#   LATEST - the pending action keeps its place in line but runs with the newest arguments
+
+TOGGLE = "toggle"
+LATEST = "latest"
+
+class _Action:
+    __slots__ = ("key", "func", "args", "coalesce", "queued_at", "cancelled")
+    def __init__(self, key, func, args, coalesce):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.coalesce = coalesce
+        self.queued_at = time.perf_counter()
+        self.cancelled = False
+
+# --- STATE ---
+_queue = queue.Queue(maxsize=config.ACTION_QUEUE_SIZE)
+_pending = {}                # key -> waiting _Action that later submits may coalesce into
+_lock = threading.Lock()
+_thread = None
+_stop = object()             # Sentinel that ends the worker
+_stopped = False             # stop() was called: later submits are dropped, the worker stays down
+
+# --- METRICS ---
+submitted = 0
+executed = 0
+coalesced = 0
+dropped = 0
+failed = 0
+max_depth = 0
+last_wait_ms = 0.0           # Queue wait of the last action run
+max_exec_ms = 0.0
+_exec_ms = {}                # key -> (count, total ms, max ms)
+
+def submit(key, func, *args, coalesce=None):
+    """
+    Queues func(*args) on the worker thread. Never blocks the caller.
+    Returns False if the action was coalesced away, the queue is full or the executor was stopped.
+    """
+    global submitted, coalesced, dropped, max_depth
+    with _lock:
+        submitted += 1
+        if _stopped:
+            # App exit: a late keyboard toggle must not bring the worker back
+            dropped += 1
+            return False
+        if _thread is None:
+            _start()
+        pending = _pending.get(key) if coalesce else None
+        if pending is not None:
+            coalesced += 1
+            if coalesce == TOGGLE:
+                pending.cancelled = True
+                del _pending[key]
+            else:
+                pending.args = args
+            return False
+
+        action = _Action(key, func, args, coalesce)
+        try:
+            _queue.put_nowait(action)
+        except queue.Full:
+            dropped += 1
+            print(f"[Executor] Queue full, dropped '{key}'")
+            return False
+        if coalesce:
+            _pending[key] = action
+        max_depth = max(max_depth, _queue.qsize())
+    return True
+
+def _run(action):
+    global executed, failed, last_wait_ms, max_exec_ms
+    start = time.perf_counter()
+    last_wait_ms = (start - action.queued_at) * 1000.0
+    try:
+        action.func(*action.args)
+    except Exception as e:
+        failed += 1
+        print(f"[Executor] '{action.key}' failed: {e}")
+    end = time.perf_counter()
+    profiler.add("action." + action.key, start, end)
+
+    ms = (end - start) * 1000.0
+    count, total, worst = _exec_ms.get(action.key, (0, 0.0, 0.0))
+    _exec_ms[action.key] = (count + 1, total + ms, max(worst, ms))
+    max_exec_ms = max(max_exec_ms, ms)
+    executed += 1
+
+def _worker():
+    while True:
+        action = _queue.get()
+        if action is _stop:
+            break
+        with _lock:
+            # Once picked up, later submits queue a fresh action instead of coalescing
+            if _pending.get(action.key) is action:
+                del _pending[action.key]
+            if action.cancelled:
+                continue
+        _run(action)
+
+def _start():
+    global _thread
+    _thread = threading.Thread(target=_worker, name="ActionExecutor", daemon=True)
+    _thread.start()
+
+def stop(timeout=2.0):
+    """Runs everything already queued, then ends the worker (app exit)."""
+    global _thread, _stopped
+    with _lock:
+        _stopped = True
+        thread = _thread
+        _thread = None
+    if thread is None:
+        return
+    try:
+        _queue.put(_stop, timeout=timeout)
+    except queue.Full:
+        pass
+    thread.join(timeout)
+
+def depth():
+    return _queue.qsize()
+
+def get_stats():
+    return {
+        "depth": _queue.qsize(),
+        "max_depth": max_depth,
+        "submitted": submitted,
+        "executed": executed,
+        "coalesced": coalesced,
+        "dropped": dropped,
+        "failed": failed,
+        "last_wait_ms": round(last_wait_ms, 2),
+        "max_exec_ms": round(max_exec_ms, 2),
+        "exec_ms": {k: {"count": c, "avg": round(t / c, 2), "max": round(m, 2)}
+                    for k, (c, t, m) in _exec_ms.items()},
+    }
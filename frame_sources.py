@@ -0,0 +1,204 @@
+import cv2
+import glob
+import os
+import sys
+import time
+import numpy as np
+import config
+
+# Every backend mimics the small slice of cv2.VideoCapture that camera.py uses:
+#   read(buf) -> (success, img), isOpened(), release(), set(prop, value)
+# so the capture thread, main_loop and tracking.process_frame never know
+# whether frames come from a webcam, a recording or a generator.
+
+# --- PACING MODES ---
+PACING_REALTIME = "realtime"   # Deliver frames at the clip's native rate (behaves like a camera)
+PACING_FAST = "fast"           # Deliver frames as fast as the consumer takes them (benchmarks)
+
+class FrameSource:
+    """Base class. lossless=True asks the capture ring to never drop frames."""
+    lossless = False
+    finished = False
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0
+
+    def release(self):
+        pass
+
+class DeviceSource(FrameSource):
+    """Live webcam (DirectShow on Windows, default backend elsewhere)."""
+    def __init__(self, index=0, width=640, height=480):
+        api = cv2.CAP_DSHOW if sys.platform == "win32" else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, api)
+
+        # --- 1. MJPG COMPRESSION ---
+        if config.USE_MJPG:
+            try:
+                fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+                self.cap.set(cv2.CAP_PROP_FOURCC, fourcc)
+                print("[Camera] MJPG Compression ENABLED")
+            except:
+                print("[Camera] Warning: MJPG not supported.")
+        else:
+            print("[Camera] MJPG Compression DISABLED (Standard)")
+
+        # --- 2. RESOLUTION & FPS ---
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+        self.cap.set(cv2.CAP_PROP_FPS, config.CAMERA_FPS)
+        print(f"[Camera] Requested FPS: {config.CAMERA_FPS}")
+
+        # Keep the driver queue short, the capture thread drains it anyway
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # --- 3. EXPOSURE (Default to Auto) ---
+        # We now rely on the user opening the Settings Panel to fix Low Light Comp
+        self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.75) # Auto
+
+    def read(self, buf=None):
+        return self.cap.read(buf)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+class _PacedSource(FrameSource):
+    """Shared pacing logic for replay backends."""
+    def __init__(self, fps, pacing, loop):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.pacing = pacing
+        self.loop = loop
+        self.lossless = (pacing == PACING_FAST)
+        self.next_time = None
+
+    def _pace(self):
+        if self.pacing != PACING_REALTIME:
+            return
+        now = time.perf_counter()
+        if self.next_time is None:
+            self.next_time = now
+        delay = self.next_time - now
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -0.5:
+            # Consumer stalled for a long time, resync instead of bursting
+            self.next_time = now
+        self.next_time += 1.0 / self.fps
+
+class VideoFileSource(_PacedSource):
+    """Replays a video file."""
+    def __init__(self, path, pacing=PACING_REALTIME, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), pacing, loop)
+        self.path = path
+        print(f"[Camera] Replaying video: {path} ({self.fps:.1f} fps, {pacing})")
+
+    def read(self, buf=None):
+        if self.finished:
+            return False, None
+        self._pace()
+        success, img = self.cap.read(buf)
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read(buf)
+        if not success:
+            self.finished = True
+        return success, img
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+class ImageSequenceSource(_PacedSource):
+    """Replays a directory (or glob pattern) of still images in name order."""
+    def __init__(self, path, fps=30.0, pacing=PACING_REALTIME, loop=False):
+        super().__init__(fps, pacing, loop)
+        pattern = os.path.join(path, "*") if os.path.isdir(path) else path
+        exts = (".png", ".jpg", ".jpeg", ".bmp")
+        self.files = sorted(f for f in glob.glob(pattern) if f.lower().endswith(exts))
+        self.pos = 0
+        print(f"[Camera] Replaying {len(self.files)} images from {path} ({pacing})")
+
+    def read(self, buf=None):
+        if self.pos >= len(self.files):
+            if self.loop and self.files:
+                self.pos = 0
+            else:
+                self.finished = True
+                return False, None
+        self._pace()
+        img = cv2.imread(self.files[self.pos])
+        self.pos += 1
+        if img is None:
+            return False, None
+        if buf is not None and buf.shape == img.shape:
+            buf[...] = img
+            img = buf
+        return True, img
+
+    def isOpened(self):
+        return len(self.files) > 0
+
+class SyntheticSource(_PacedSource):
+    """
+    Generates frames without any hardware: a skin-toned blob drifting over a
+    dark background. No hand model will lock onto it, but it exercises the full
+    capture -> flip -> cvtColor -> inference path at a known resolution.
+    """
+    def __init__(self, width=640, height=480, fps=30.0, pacing=PACING_REALTIME, frame_limit=0):
+        super().__init__(fps, pacing, loop=False)
+        self.width, self.height = width, height
+        self.frame_limit = frame_limit
+        self.count = 0
+        print(f"[Camera] Synthetic source {self.width}x{self.height} ({pacing})")
+
+    def read(self, buf=None):
+        if self.frame_limit and self.count >= self.frame_limit:
+            self.finished = True
+            return False, None
+        self._pace()
+        if buf is None or buf.shape != (self.height, self.width, 3):
+            buf = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        buf.fill(30)
+        t = self.count / self.fps
+        cx = int(self.width * (0.5 + 0.3 * np.sin(t)))
+        cy = int(self.height * (0.5 + 0.2 * np.cos(t * 0.7)))
+        cv2.circle(buf, (cx, cy), self.height // 8, (120, 160, 210), cv2.FILLED)
+        self.count += 1
+        return True, buf
+
+def create_source(width=640, height=480):
+    """Builds the backend selected by config.FRAME_SOURCE."""
+    kind = getattr(config, 'FRAME_SOURCE', "device")
+    path = getattr(config, 'FRAME_SOURCE_PATH', "")
+    pacing = getattr(config, 'FRAME_SOURCE_PACING', PACING_REALTIME)
+    loop = getattr(config, 'FRAME_SOURCE_LOOP', False)
+
+    if kind == "video":
+        return VideoFileSource(path, pacing=pacing, loop=loop)
+    if kind == "images":
+        return ImageSequenceSource(path, fps=config.CAMERA_FPS, pacing=pacing, loop=loop)
+    if kind == "synthetic":
+        return SyntheticSource(width, height, fps=config.CAMERA_FPS, pacing=pacing)
+    return DeviceSource(0, width, height)
@@ -0,0 +1,116 @@
+import numpy as np
+
+# Declarative gesture engine.
+# Each gesture is declared once below as:
+#   engage   - raw conditions that must all hold to switch it on
+#   sustain  - conditions that must all hold to keep it on (hysteresis; defaults to engage)
+#   on_ms    - how long the engage conditions must hold before it activates
+#   off_ms   - how long it survives after its conditions drop
+#   blocked_by / guard_ms - cannot engage while (or for guard_ms after) these are active
+# The table is compiled into boolean matrices, so every gesture is evaluated in
+# one NumPy pass per frame and timing is in milliseconds, not frames.
+
+# --- RAW CONDITIONS (filled by tracking each frame, in this order) ---
+CONDITIONS = (
+    "middle_above_pip",     # Middle tip clearly above its PIP joint
+    "middle_above_index",   # Middle tip above the index tip
+    "pinky_raised",         # Pinky tip clearly above its PIP joint
+    "pinch_close",          # Thumb tip to middle PIP under CLICK_DIST (scaled)
+    "pinch_held",           # ... still under RELEASE_DIST (scaled)
+    "voice_close",          # Thumb tip to pinky tip under 1.2 x CLICK_DIST (scaled)
+    "voice_near",           # ... under 3 x CLICK_DIST: the voice gesture is being approached
+)
+C = {name: i for i, name in enumerate(CONDITIONS)}
+
+class Gesture:
+    __slots__ = ("name", "engage", "sustain", "on_ms", "off_ms", "blocked_by", "guard_ms")
+    def __init__(self, name, engage, sustain=None, on_ms=0, off_ms=0, blocked_by=(), guard_ms=0):
+        self.name = name
+        self.engage = engage
+        self.sustain = sustain if sustain is not None else engage
+        self.on_ms = on_ms
+        self.off_ms = off_ms
+        self.blocked_by = blocked_by
+        self.guard_ms = guard_ms
+
+# --- GESTURE TABLE ---
+GESTURES = (
+    # Two-finger touch (scroll / zoom): middle finger held straight ~5 frames at 30 fps
+    Gesture("dual", engage=("middle_above_pip", "middle_above_index"), on_ms=165),
+    # Click / drag: pinch with release hysteresis; no new pinch right after leaving dual mode
+    # (fingers are still settling, this used to produce stray clicks)
+    Gesture("pinch", engage=("pinch_close",), sustain=("pinch_held",), blocked_by=("dual",), guard_ms=100),
+    # Touch keyboard toggle: pinky raised and held
+    Gesture("keyboard", engage=("pinky_raised",), on_ms=200, blocked_by=("voice",)),
+    # Push-to-talk: thumb on pinky, mic stays open briefly after the fingers part
+    Gesture("voice", engage=("voice_close",), off_ms=660),
+    # Whisper preload hint: thumb heading for the pinky (no action of its own)
+    Gesture("voice_near", engage=("voice_near",), on_ms=100, off_ms=1000),
+)
+G = {g.name: i for i, g in enumerate(GESTURES)}
+
+def _mask(names, index):
+    m = np.zeros(len(index), dtype=bool)
+    for n in names:
+        m[index[n]] = True
+    return m
+
+# --- COMPILED TABLE ---
+ENGAGE = np.array([_mask(g.engage, C) for g in GESTURES])
+SUSTAIN = np.array([_mask(g.sustain, C) for g in GESTURES])
+BLOCKS = np.array([_mask(g.blocked_by, G) for g in GESTURES])
+ON_S = np.array([g.on_ms / 1000.0 for g in GESTURES])
+OFF_S = np.array([g.off_ms / 1000.0 for g in GESTURES])
+GUARD_S = np.array([g.guard_ms / 1000.0 for g in GESTURES])
+
+# --- STATE ---
+conditions = np.zeros(len(CONDITIONS), dtype=bool)   # Written in place by tracking
+active = np.zeros(len(GESTURES), dtype=bool)
+activated = np.zeros(len(GESTURES), dtype=bool)      # Rising edges of the last update
+deactivated = np.zeros(len(GESTURES), dtype=bool)    # Falling edges of the last update
+_raw = np.zeros(len(GESTURES), dtype=bool)           # Last raw (untimed) result
+_changed_at = np.zeros(len(GESTURES))                # When _raw last flipped
+_released_at = np.full(len(GESTURES), -1e9)          # When each gesture last switched off
+
+def reset():
+    """Drops every gesture immediately (service stop)."""
+    conditions[:] = False
+    active[:] = False
+    activated[:] = False
+    deactivated[:] = False
+    _raw[:] = False
+    _released_at[:] = -1e9
+
+def update(now):
+    """Evaluates every gesture against `conditions` at time `now` (seconds)."""
+    # 1. Raw result: engage conditions when off, sustain conditions when on
+    missing = ~conditions
+    engage_ok = ~(ENGAGE & missing).any(axis=1)
+    sustain_ok = ~(SUSTAIN & missing).any(axis=1)
+    raw = np.where(active, sustain_ok, engage_ok)
+
+    # 2. Exclusion: blockers active now or released less than guard_ms ago
+    guard_busy = (now - _released_at)[None, :] < GUARD_S[:, None]
+    blocked = (BLOCKS & (active[None, :] | guard_busy)).any(axis=1)
+    raw &= ~(blocked & ~active)
+
+    # 3. Hold timing
+    flipped = raw != _raw
+    _changed_at[flipped] = now
+    _raw[:] = raw
+    held = now - _changed_at
+    turn_on = raw & ~active & (held >= ON_S)
+    turn_off = ~raw & active & (held >= OFF_S)
+
+    activated[:] = turn_on
+    deactivated[:] = turn_off
+    active[turn_on] = True
+    active[turn_off] = False
+    _released_at[turn_off] = now
+    return active
+
+def is_active(name):
+    return bool(active[G[name]])
+
+def just_activated(name):
+    return bool(activated[G[name]])
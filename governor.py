@@ -0,0 +1,112 @@
+import time
+import config
+
+# Activity-driven frame-rate governor.
+#   ACTIVE     hand visible                    -> full inference + capture rate
+#   SEARCHING  hand just lost                  -> full rate so it is re-acquired instantly
+#   IDLE       no hand for GOV_IDLE_AFTER s    -> reduced inference + capture rate
+#   DEEP_IDLE  no hand for GOV_DEEP_IDLE_AFTER -> slowest rate, camera parked between short probes
+# Rates of 0 mean "as fast as the camera delivers".
+
+# --- STATES ---
+ACTIVE = "ACTIVE"
+SEARCHING = "SEARCHING"
+IDLE = "IDLE"
+DEEP_IDLE = "DEEP_IDLE"
+
+# --- STATE ---
+state = SEARCHING
+state_since = time.perf_counter()
+last_hand_time = time.perf_counter()
+probe_start = time.perf_counter()   # When the camera was last (re)opened in deep idle
+parked = False                      # True while the camera is released by deep idle
+transitions = 0
+
+def inference_fps(s=None):
+    s = s or state
+    if s == ACTIVE: return config.GOV_ACTIVE_FPS
+    if s == SEARCHING: return config.GOV_SEARCH_FPS
+    if s == IDLE: return config.GOV_IDLE_FPS
+    return config.GOV_DEEP_IDLE_FPS
+
+def capture_fps(s=None):
+    s = s or state
+    if s == IDLE: return config.GOV_IDLE_CAPTURE_FPS
+    if s == DEEP_IDLE: return config.GOV_DEEP_IDLE_CAPTURE_FPS
+    return 0
+
+def reset():
+    """Called when the service (re)starts: begin in SEARCHING with fresh timers."""
+    global state, state_since, last_hand_time, probe_start, parked
+    now = time.perf_counter()
+    state = SEARCHING
+    state_since = now
+    last_hand_time = now
+    probe_start = now
+    parked = False
+
+def _set_state(new_state, now):
+    global state, state_since, transitions
+    if new_state == state:
+        return
+    print(f"[Governor] {state} -> {new_state} (after {now - state_since:.1f}s, "
+          f"inference {inference_fps(new_state) or 'max'} fps, capture {capture_fps(new_state) or 'max'} fps)")
+    state = new_state
+    state_since = now
+    transitions += 1
+
+def update(hand_detected, now=None):
+    """Feed the latest detection result. Returns the (possibly new) state."""
+    global last_hand_time
+    if now is None:
+        now = time.perf_counter()
+
+    if hand_detected:
+        last_hand_time = now
+        _set_state(ACTIVE, now)
+        return state
+
+    absent = now - last_hand_time
+    if absent >= config.GOV_DEEP_IDLE_AFTER:
+        _set_state(DEEP_IDLE, now)
+    elif absent >= config.GOV_IDLE_AFTER:
+        _set_state(IDLE, now)
+    else:
+        _set_state(SEARCHING, now)
+    return state
+
+def wake(now=None):
+    """External activity (motion, tray, voice) forces a fast search."""
+    global last_hand_time
+    if now is None:
+        now = time.perf_counter()
+    if state in (IDLE, DEEP_IDLE):
+        last_hand_time = now
+        _set_state(SEARCHING, now)
+
+def wait_next_frame(frame_start):
+    """Sleeps out the rest of the current state's inference period."""
+    fps = inference_fps()
+    if fps <= 0:
+        return
+    remaining = (1.0 / fps) - (time.perf_counter() - frame_start)
+    if remaining > 0:
+        time.sleep(remaining)
+
+def should_park_camera(now=None):
+    """True when deep idle wants the camera released until the next probe."""
+    if state != DEEP_IDLE or not config.GOV_DEEP_IDLE_PARK_CAMERA or parked:
+        return False
+    if now is None:
+        now = time.perf_counter()
+    return (now - probe_start) >= config.GOV_PROBE_SECONDS
+
+def park():
+    global parked
+    parked = True
+    print(f"[Governor] Camera parked for {config.GOV_PARK_SECONDS:.1f}s")
+
+def unpark():
+    global parked, probe_start
+    parked = False
+    probe_start = time.perf_counter()
@@ -1,6 +1,7 @@
 import tkinter as tk
 import config
 import camera
+import events
 
 # Define globals
 root = None
@@ -38,9 +39,20 @@ class StatusOverlay:
         self.canvas.pack()
         self.circle = self.canvas.create_oval(5, 5, 55, 55, fill="gray", outline="")
         self.text = self.canvas.create_text(30, 30, text="", fill="white", font=("Arial", 10, "bold"))
+        self.scheduled = False
+        # Hidden, the overlay doesn't tick: these wake it (after() hands the call to the Tk thread)
+        for topic in (events.RUN, events.VOICE, events.GESTURE):
+            events.subscribe(topic, lambda: self.top.after(0, self.wake))
         self.update_overlay()
 
+    def wake(self):
+        if not self.scheduled:
+            self.update_overlay()
+
     def update_overlay(self):
+        self.scheduled = False
+        if events.shutting_down():
+            return
         if not config.voice_enabled:
             self.top.withdraw()
         else:
@@ -82,41 +94,46 @@ class StatusOverlay:
                 self.top.deiconify()
                 self.canvas.itemconfig(self.circle, fill=color)
                 self.canvas.itemconfig(self.text, text=text_str)
-
-        self.top.after(40, self.update_overlay)
+                # Visible: keep following the hand and the voice status
+                self.scheduled = True
+                self.top.after(40, self.update_overlay)
 
 def commit_settings_to_config():
     """Reads all GUI variables and pushes them to config.py"""
     try:
-        if scale_sens: config.SENSITIVITY = int(scale_sens.get())
-        if scale_smooth: config.SMOOTHING = float(scale_smooth.get())
-        if scale_click: config.CLICK_DIST = int(scale_click.get())
-        if scale_release: config.RELEASE_DIST = int(scale_release.get())
-        if scale_depth: config.DEPTH_SCALE = float(scale_depth.get())
-        if scale_off_x: config.BOX_OFFSET_X = int(scale_off_x.get())
-        if scale_off_y: config.BOX_OFFSET_Y = int(scale_off_y.get())
-        
-        if var_res: config.RESOLUTION_ID = var_res.get()
-        if var_model: config.MODEL_COMPLEXITY = var_model.get()
-        if var_head: config.HEADLESS_DEFAULT = bool(var_head.get())
-        if var_voice: config.voice_enabled = bool(var_voice.get())
-        if var_voice_always: config.VOICE_ALWAYS_ON = bool(var_voice_always.get())
-        if var_audio_start: config.AUDIO_START = bool(var_audio_start.get())
-        if var_mjpg: config.USE_MJPG = bool(var_mjpg.get())
-        if scale_fps: config.CAMERA_FPS = int(scale_fps.get())
+        # One store update, so the tracking thread never sees half the new settings
+        values = slider_values()
+        if var_res: values["RESOLUTION_ID"] = var_res.get()
+        if var_model: values["MODEL_COMPLEXITY"] = var_model.get()
+        if var_head: values["HEADLESS_DEFAULT"] = bool(var_head.get())
+        if var_voice: set_voice_enabled(var_voice.get())
+        if var_voice_always: values["VOICE_ALWAYS_ON"] = bool(var_voice_always.get())
+        if var_audio_start: values["AUDIO_START"] = bool(var_audio_start.get())
+        if var_mjpg: values["USE_MJPG"] = bool(var_mjpg.get())
+        if scale_fps: values["CAMERA_FPS"] = int(scale_fps.get())
+        config.update(values, source="gui")
 
         print("GUI Settings synced to Config.")
     except Exception as e:
         print(f"Error syncing settings: {e}")
 
+def slider_values():
+    values = {}
+    if scale_sens: values["SENSITIVITY"] = int(scale_sens.get())
+    if scale_smooth: values["SMOOTHING"] = float(scale_smooth.get())
+    if scale_click: values["CLICK_DIST"] = int(scale_click.get())
+    if scale_release: values["RELEASE_DIST"] = int(scale_release.get())
+    if scale_depth: values["DEPTH_SCALE"] = float(scale_depth.get())
+    if scale_off_x: values["BOX_OFFSET_X"] = int(scale_off_x.get())
+    if scale_off_y: values["BOX_OFFSET_Y"] = int(scale_off_y.get())
+    return values
+
+def set_voice_enabled(value):
+    config.voice_enabled = bool(value)
+    events.publish(events.VOICE)
+
 def update_config_from_ui(val=None):
-    if scale_sens: config.SENSITIVITY = int(scale_sens.get())
-    if scale_smooth: config.SMOOTHING = float(scale_smooth.get())
-    if scale_click: config.CLICK_DIST = int(scale_click.get())
-    if scale_release: config.RELEASE_DIST = int(scale_release.get())
-    if scale_depth: config.DEPTH_SCALE = float(scale_depth.get())
-    if scale_off_x: config.BOX_OFFSET_X = int(scale_off_x.get())
-    if scale_off_y: config.BOX_OFFSET_Y = int(scale_off_y.get())
+    config.update(slider_values(), source="gui")
 
 def create_window(start_callback, stop_callback, headless_callback):
     global root, scale_sens, scale_smooth, scale_click, scale_release, scale_depth, scale_fps
@@ -184,7 +201,7 @@ def create_window(start_callback, stop_callback, headless_callback):
     voice_frame.pack(pady=5, fill="x", padx=20)
     tk.Label(voice_frame, text="Voice Control", font=("Segoe UI", 9, "bold")).pack()
     
-    tk.Checkbutton(voice_frame, text="Enable Voice Engine", variable=var_voice, command=lambda: setattr(config, 'voice_enabled', bool(var_voice.get()))).pack(anchor="w")
+    tk.Checkbutton(voice_frame, text="Enable Voice Engine", variable=var_voice, command=lambda: set_voice_enabled(var_voice.get())).pack(anchor="w")
     
     def on_always_voice():
         config.VOICE_ALWAYS_ON = bool(var_voice_always.get())
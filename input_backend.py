@@ -0,0 +1,348 @@
+import os
+import sys
+import threading
+import ctypes
+from ctypes import sizeof
+import config
+import touch_engine
+from input_structs import INPUT
+
+# Per-frame input batch.
+# actions.handle_input queues pointer moves, button changes and touch contacts while
+# it walks the gesture logic; commit() then hands the whole frame to the backend:
+# one InjectTouchInput for the contacts and one SendInput (or one uinput/X11 sync)
+# for everything else. The batch lives in preallocated lists, nothing is built per frame.
+#   "win32"     - SendInput + InjectTouchInput
+#   "uinput"    - Linux /dev/uinput pointer and multitouch devices (needs python-evdev)
+#   "x11"       - XTest pointer and buttons, no touch (needs python-xlib)
+#   "recording" - keeps every committed frame in memory (tests, benchmarks)
+#   "null"      - discards everything
+
+# --- EVENT KINDS ---
+EV_MOVE = 0      # Absolute pointer position (x, y) in screen pixels
+EV_BUTTON = 1    # Left button, x = 1 down / 0 up
+EV_NUDGE = 2     # 1 px relative move, makes Windows show the cursor again after a touch
+
+MAX_EVENTS = 16
+
+# --- BATCH ---
+_kind = [0] * MAX_EVENTS
+_x = [0] * MAX_EVENTS
+_y = [0] * MAX_EVENTS
+_count = 0
+_touch_pending = False
+
+backend = None
+# commit() (tracking thread) and move_now() (cursor output thread) write the same device:
+# one at a time, so a move never lands inside a frame's touch / button report
+_write_lock = threading.Lock()
+
+# --- METRICS ---
+commits = 0
+events_sent = 0
+events_dropped = 0
+
+def _queue(kind, x, y):
+    global _count, events_dropped
+    if _count >= MAX_EVENTS:
+        events_dropped += 1
+        return
+    _kind[_count] = kind
+    _x[_count] = x
+    _y[_count] = y
+    _count += 1
+
+def move(x, y):
+    _queue(EV_MOVE, int(x), int(y))
+
+def button(down):
+    _queue(EV_BUTTON, 1 if down else 0, 0)
+
+def nudge():
+    _queue(EV_NUDGE, 0, 0)
+
+def touch(pointer_id, x, y, is_down):
+    """Updates a touch contact; it is sent with the rest of the frame on commit()."""
+    global _touch_pending
+    if touch_engine.update_touch(pointer_id, x, y, is_down):
+        _touch_pending = True
+
+def commit():
+    """
+    Sends everything queued since the last commit.
+    Returns False if a touch batch was queued and rejected (caller falls back to the mouse).
+    """
+    global _count, _touch_pending, commits, events_sent
+    touch_ok = True
+    if not _touch_pending and not _count:
+        return True
+    with _write_lock:
+        if _touch_pending:
+            _touch_pending = False
+            touch_ok = touch_engine.process_frame()
+        backend.commit(_kind, _x, _y, _count)
+    events_sent += _count
+    _count = 0
+    commits += 1
+    return touch_ok
+
+def move_now(x, y):
+    """Immediate pointer move outside the frame batch (cursor output thread)."""
+    with _write_lock:
+        backend.move_now(int(x), int(y))
+
+# --- BACKENDS ---
+class InputBackend:
+    """
+    commit() gets the frame's (kind, x, y) events once per frame, after its touch batch
+    (count may be 0 for touch-only frames). `touch` is its touch_engine backend, if any.
+    """
+    name = "base"
+    touch = None
+    def commit(self, kinds, xs, ys, count):
+        pass
+    def move_now(self, x, y):
+        pass
+    def screen_size(self):
+        """(width, height) of the screen it injects into, None if it can't tell."""
+        return None
+
+INPUT_MOUSE = 0
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+class Win32Backend(InputBackend):
+    name = "win32"
+    def __init__(self):
+        user32 = ctypes.windll.user32
+        try:
+            # Physical pixels for GetSystemMetrics / SetCursorPos on scaled displays
+            user32.SetProcessDPIAware()
+        except Exception:
+            pass
+        self._get_metrics = user32.GetSystemMetrics
+        self._send_input = user32.SendInput
+        self._set_cursor_pos = user32.SetCursorPos
+        self._inputs = (INPUT * MAX_EVENTS)()
+        self._size = sizeof(INPUT)
+        for inp in self._inputs:
+            inp.type = INPUT_MOUSE
+        self.touch = touch_engine.Win32TouchBackend()
+
+    def commit(self, kinds, xs, ys, count):
+        if not count:
+            return
+        w, h = config.wScr, config.hScr
+        for i in range(count):
+            mi = self._inputs[i].ii.mi
+            kind = kinds[i]
+            if kind == EV_MOVE:
+                # Absolute coordinates are 0..65535 over the primary screen; round up so
+                # Windows' floor(n * w / 65536) lands back on the requested pixel
+                mi.dx = (xs[i] * 65536 + w - 1) // w
+                mi.dy = (ys[i] * 65536 + h - 1) // h
+                mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE
+            elif kind == EV_BUTTON:
+                mi.dx = mi.dy = 0
+                mi.dwFlags = MOUSEEVENTF_LEFTDOWN if xs[i] else MOUSEEVENTF_LEFTUP
+            else:
+                mi.dx, mi.dy = 1, 0
+                mi.dwFlags = MOUSEEVENTF_MOVE
+        self._send_input(count, self._inputs, self._size)
+
+    def move_now(self, x, y):
+        self._set_cursor_pos(x, y)
+
+    def screen_size(self):
+        # SM_CXSCREEN / SM_CYSCREEN: the primary screen, which absolute SendInput spans
+        return self._get_metrics(0), self._get_metrics(1)
+
+class UinputTouch(touch_engine.TouchBackend):
+    """Writes packed touch_engine contacts as multitouch protocol B slots."""
+    name = "uinput"
+    def __init__(self, device, ecodes):
+        self._dev = device
+        self._e = ecodes
+        self._tracking = [-1] * touch_engine.MAX_TOUCHES
+        self._next_id = 0
+
+    def initialize(self, max_contacts):
+        return True
+
+    def inject(self, address, count):
+        e, dev = self._e, self._dev
+        contacts = (touch_engine.POINTER_TOUCH_INFO * count).from_address(address)
+        for c in contacts:
+            pi = c.pointerInfo
+            slot = pi.pointerId
+            dev.write(e.EV_ABS, e.ABS_MT_SLOT, slot)
+            if pi.pointerFlags & touch_engine.POINTER_FLAG_UP:
+                dev.write(e.EV_ABS, e.ABS_MT_TRACKING_ID, -1)
+                self._tracking[slot] = -1
+                continue
+            if self._tracking[slot] < 0:
+                self._tracking[slot] = self._next_id
+                self._next_id = (self._next_id + 1) & 0xFFFF
+                dev.write(e.EV_ABS, e.ABS_MT_TRACKING_ID, self._tracking[slot])
+            dev.write(e.EV_ABS, e.ABS_MT_POSITION_X, pi.ptPixelLocation.x)
+            dev.write(e.EV_ABS, e.ABS_MT_POSITION_Y, pi.ptPixelLocation.y)
+        dev.write(e.EV_KEY, e.BTN_TOUCH, 1 if max(self._tracking) >= 0 else 0)
+        dev.syn()
+        return True
+
+class UinputBackend(InputBackend):
+    name = "uinput"
+    def __init__(self):
+        from evdev import UInput, AbsInfo, ecodes as e
+        self._e = e
+        w, h = config.wScr, config.hScr
+        self._pointer = UInput({
+            e.EV_KEY: [e.BTN_LEFT],
+            e.EV_REL: [e.REL_X],
+            e.EV_ABS: [(e.ABS_X, AbsInfo(0, 0, w - 1, 0, 0, 0)),
+                       (e.ABS_Y, AbsInfo(0, 0, h - 1, 0, 0, 0))],
+        }, name="handmouse-pointer")
+        self._touchscreen = UInput({
+            e.EV_KEY: [e.BTN_TOUCH],
+            e.EV_ABS: [(e.ABS_X, AbsInfo(0, 0, w - 1, 0, 0, 0)),
+                       (e.ABS_Y, AbsInfo(0, 0, h - 1, 0, 0, 0)),
+                       (e.ABS_MT_SLOT, AbsInfo(0, 0, touch_engine.MAX_TOUCHES - 1, 0, 0, 0)),
+                       (e.ABS_MT_TRACKING_ID, AbsInfo(0, 0, 65535, 0, 0, 0)),
+                       (e.ABS_MT_POSITION_X, AbsInfo(0, 0, w - 1, 0, 0, 0)),
+                       (e.ABS_MT_POSITION_Y, AbsInfo(0, 0, h - 1, 0, 0, 0))],
+        }, name="handmouse-touch", input_props=[e.INPUT_PROP_DIRECT])
+        self.touch = UinputTouch(self._touchscreen, e)
+
+    def commit(self, kinds, xs, ys, count):
+        if not count:
+            return
+        e, dev = self._e, self._pointer
+        for i in range(count):
+            kind = kinds[i]
+            if kind == EV_MOVE:
+                dev.write(e.EV_ABS, e.ABS_X, xs[i])
+                dev.write(e.EV_ABS, e.ABS_Y, ys[i])
+            elif kind == EV_BUTTON:
+                dev.write(e.EV_KEY, e.BTN_LEFT, xs[i])
+            else:
+                dev.write(e.EV_REL, e.REL_X, 1)
+        dev.syn()
+
+    def move_now(self, x, y):
+        e, dev = self._e, self._pointer
+        dev.write(e.EV_ABS, e.ABS_X, x)
+        dev.write(e.EV_ABS, e.ABS_Y, y)
+        dev.syn()
+
+class X11Backend(InputBackend):
+    name = "x11"
+    def __init__(self):
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self._X = X
+        self._xtest = xtest
+        self._display = display.Display()
+
+    def commit(self, kinds, xs, ys, count):
+        if not count:
+            return
+        X, d = self._X, self._display
+        for i in range(count):
+            kind = kinds[i]
+            if kind == EV_MOVE:
+                self._xtest.fake_input(d, X.MotionNotify, x=xs[i], y=ys[i])
+            elif kind == EV_BUTTON:
+                self._xtest.fake_input(d, X.ButtonPress if xs[i] else X.ButtonRelease, 1)
+        d.sync()
+
+    def move_now(self, x, y):
+        self._xtest.fake_input(self._display, self._X.MotionNotify, x=x, y=y)
+        self._display.sync()
+
+    def screen_size(self):
+        screen = self._display.screen()
+        return screen.width_in_pixels, screen.height_in_pixels
+
+class RecordingTouch(touch_engine.TouchBackend):
+    name = "recording"
+    def __init__(self, owner):
+        self._owner = owner
+    def initialize(self, max_contacts):
+        return True
+    def inject(self, address, count):
+        contacts = (touch_engine.POINTER_TOUCH_INFO * count).from_address(address)
+        self._owner.pending.extend(
+            ("touch", c.pointerInfo.pointerId, c.pointerInfo.pointerFlags,
+             c.pointerInfo.ptPixelLocation.x, c.pointerInfo.ptPixelLocation.y)
+            for c in contacts)
+        return True
+
+class RecordingBackend(InputBackend):
+    """Keeps one list of event tuples per commit in `frames`; `moves` collects move_now calls."""
+    name = "recording"
+    _NAMES = ("move", "button", "nudge")
+    def __init__(self):
+        self.frames = []
+        self.pending = []
+        self.moves = []
+        self.touch = RecordingTouch(self)
+
+    def commit(self, kinds, xs, ys, count):
+        self.pending.extend((self._NAMES[kinds[i]], xs[i], ys[i]) for i in range(count))
+        self.frames.append(self.pending)
+        self.pending = []
+
+    def move_now(self, x, y):
+        self.moves.append((x, y))
+
+class NullBackend(InputBackend):
+    name = "null"
+    def __init__(self):
+        self.touch = touch_engine.NullTouchBackend()
+
+def create_backend(kind):
+    if kind == "recording":
+        return RecordingBackend()
+    if kind == "null":
+        return NullBackend()
+    if kind == "win32" or (kind == "auto" and sys.platform == "win32"):
+        return Win32Backend()
+    if kind in ("uinput", "x11"):
+        return UinputBackend() if kind == "uinput" else X11Backend()
+    # auto on Linux: X11 first (no permissions needed), then uinput
+    if os.environ.get("DISPLAY"):
+        try:
+            return X11Backend()
+        except Exception:
+            pass
+    try:
+        return UinputBackend()
+    except Exception:
+        pass
+    print("[Input] No input backend available, events are discarded")
+    return NullBackend()
+
+def set_backend(new_backend):
+    """Swaps the backend, drops anything still queued and re-initializes touch."""
+    global backend, _count, _touch_pending
+    backend = new_backend
+    _count = 0
+    _touch_pending = False
+    touch_engine.set_backend(backend.touch)
+    size = backend.screen_size()
+    if size:
+        config.wScr, config.hScr = size
+    print(f"[Input] Backend: {backend.name} ({config.wScr}x{config.hScr})")
+    return backend
+
+def init():
+    kind = config.INPUT_BACKEND
+    try:
+        return set_backend(create_backend(kind))
+    except Exception as e:
+        print(f"[Input] Backend '{kind}' failed: {e}")
+        return set_backend(NullBackend())
+
+init()
@@ -0,0 +1,13 @@
+from ctypes import c_long, c_ulong, c_ushort, Structure, Union, POINTER
+
+# SendInput structures, shared by input_backend (mouse) and text_output (keyboard).
+# Kept apart from both so importing them initializes no backend.
+
+class MOUSEINPUT(Structure):
+    _fields_ = [("dx", c_long), ("dy", c_long), ("mouseData", c_ulong), ("dwFlags", c_ulong), ("time", c_ulong), ("dwExtraInfo", POINTER(c_ulong))]
+class KEYBDINPUT(Structure):
+    _fields_ = [("wVk", c_ushort), ("wScan", c_ushort), ("dwFlags", c_ulong), ("time", c_ulong), ("dwExtraInfo", POINTER(c_ulong))]
+class INPUT_I(Union):
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT)]
+class INPUT(Structure):
+    _fields_ = [("type", c_ulong), ("ii", INPUT_I)]
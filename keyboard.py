@@ -1,6 +1,9 @@
 import subprocess
 import threading
-import winreg
+try:
+    import winreg
+except ImportError:  # Not Windows: no registry, the toggle has nothing to drive
+    winreg = None
 import config
 
 # --- POWERSHELL SCRIPTS ---
@@ -37,6 +40,8 @@ ps_process = None
 
 def ensure_tablet_mode_enabled():
     """Registry hack to ensure the keyboard actually pops up on Desktop."""
+    if winreg is None:
+        return
     try:
         key_path = r"Software\Microsoft\TabletTip\1.7"
         with winreg.CreateKey(winreg.HKEY_CURRENT_USER, key_path) as key:
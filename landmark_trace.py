@@ -0,0 +1,144 @@
+import os
+import time
+import numpy as np
+import config
+
+# --- TRACE FORMAT ---
+# 16 byte header followed by fixed-size little-endian records, one per processed frame.
+# Fixed-size records keep the file append-only and let np.memmap open it without parsing.
+# One file holds one recording session: timestamps are perf_counter values of that process.
+MAGIC = b"LMTRACE1"
+HEADER_SIZE = 16
+NUM_LANDMARKS = 21
+
+TRACE_DTYPE = np.dtype([
+    ("t", "<f8"),                          # perf_counter timestamp of the frame
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("flags", "<u2"),                      # Derived gesture state after processing (FLAG_*)
+    ("hands", "u1"),                       # 0 = no hand, 1 = landmarks valid
+    ("pad", "u1"),
+    ("lm", "<f4", (NUM_LANDMARKS, 3)),     # Normalized x, y, z from MediaPipe
+])
+
+# --- GESTURE FLAGS ---
+FLAG_HAND = 1 << 0
+FLAG_DRAGGING = 1 << 1
+FLAG_DUAL_MODE = 1 << 2
+FLAG_PINKY = 1 << 3
+FLAG_VOICE_GESTURE = 1 << 4
+FLAG_KEYBOARD = 1 << 5
+
+# --- RECORDER STATE ---
+_file = None
+_path = None
+_record = np.zeros(1, dtype=TRACE_DTYPE)  # Reused every frame, no per-frame allocation
+frames_written = 0
+
+def current_flags():
+    """Packs the gesture state left behind by tracking.process_landmarks."""
+    import tracking
+    flags = 0
+    if config.hand_detected: flags |= FLAG_HAND
+    if config.dragging: flags |= FLAG_DRAGGING
+    if tracking.is_dual_mode_active: flags |= FLAG_DUAL_MODE
+    if getattr(config, 'pinky_bent', False): flags |= FLAG_PINKY
+    if config.voice_active_gesture: flags |= FLAG_VOICE_GESTURE
+    if getattr(config, 'keyboard_triggered', False): flags |= FLAG_KEYBOARD
+    return flags
+
+def start_recording(path=None):
+    global _file, _path, frames_written
+    stop_recording()
+    _path = path or config.LANDMARK_TRACE_PATH
+    # A fresh file per session: appended sessions would leave timestamp jumps for realtime replay
+    _file = open(_path, "wb")
+    _file.write(MAGIC.ljust(HEADER_SIZE, b"\0"))
+    frames_written = 0
+    print(f"[Trace] Recording landmarks to {_path}")
+
+def stop_recording():
+    global _file
+    if _file is not None:
+        _file.close()
+        _file = None
+        print(f"[Trace] Stopped ({frames_written} frames)")
+
+def record(hand_list, w, h, timestamp):
+    """Appends one frame. Opens the trace on first use."""
+    global frames_written
+    if _file is None:
+        start_recording()
+
+    rec = _record[0]
+    rec["t"] = timestamp
+    rec["width"] = w
+    rec["height"] = h
+    rec["flags"] = current_flags()
+    if hand_list:
+        rec["hands"] = 1
+        rec["lm"] = hand_list[0]
+    else:
+        rec["hands"] = 0
+        rec["lm"] = 0.0
+    _file.write(_record.tobytes())
+    frames_written += 1
+
+def load(path):
+    """Memory-maps a trace file. Returns a structured array of records."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if not header.startswith(MAGIC):
+        raise ValueError(f"{path} is not a landmark trace")
+    count = (os.path.getsize(path) - HEADER_SIZE) // TRACE_DTYPE.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+def replay(path, realtime=False, backend=None):
+    """
+    Feeds a recorded trace back through tracking.process_landmarks (gestures,
+    cursor math and actions.handle_input) without running MediaPipe.
+    Input goes to `backend`, a fresh input_backend.RecordingBackend unless given
+    (pass input_backend.backend to really move the pointer).
+    Returns a dict with throughput and the number of frames whose derived
+    gesture flags differ from what was recorded.
+    """
+    import tracking
+    import actions
+    import input_backend
+    records = load(path)
+    previous = input_backend.backend
+    toggle_keyboard = actions.toggle_keyboard
+    input_backend.set_backend(backend or input_backend.RecordingBackend())
+    actions.toggle_keyboard = lambda: None  # A recorded pinky must not pop up the real keyboard
+    tracking.reset_pipeline()               # Same starting state as the recording, whatever ran before
+    mismatches = 0
+    start = time.perf_counter()
+    first_t = records[0]["t"] if len(records) else 0.0
+    try:
+        for rec in records:
+            if realtime:
+                delay = (rec["t"] - first_t) - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            hand_list = [rec["lm"]] if rec["hands"] else []
+            tracking.process_landmarks(hand_list, int(rec["width"]), int(rec["height"]), None, float(rec["t"]))
+
+            if current_flags() != rec["flags"]:
+                mismatches += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        tracking.reset_pipeline()           # Into the replay backend, nothing stays held
+        actions.toggle_keyboard = toggle_keyboard
+        input_backend.set_backend(previous)
+    frames = len(records)
+    stats = {
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "flag_mismatches": mismatches,
+    }
+    print(f"[Trace] Replayed {frames} frames in {elapsed:.3f}s ({stats['fps']:.0f} fps), {mismatches} flag mismatches")
+    return stats
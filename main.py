@@ -15,47 +15,81 @@ import voice
 import keyboard
 # Removed: import visual_cursor / cursor_engine
 import actions
+import landmark_trace
+import profiler
+import governor
+import motion_gate
+import cursor_output
+import gestures
+import executor
+import events
+
+SHUTDOWN_JOIN_S = 3.0       # Per-stage wait on exit before moving on without that thread
+
+ai_thread = None
+service_started = False     # Hardware / AI brought up by main_loop and not yet released
 
 def start_service():
     if not config.running:
         print("Requesting Start...")
         config.running = True
+        events.publish(events.RUN)
 
 def stop_service():
     if config.running:
         print("Requesting Stop...")
         config.running = False
+        events.publish(events.RUN)
 
 def main_loop():
     """Background thread that manages Hardware AND AI"""
-    last_hand_time = time.time()
-    
-    while True:
+    global service_started
+    while not events.shutting_down():
         if config.running:
             # --- STARTUP LOGIC ---
             if not camera.is_camera_active():
+                if governor.parked:
+                    # Deep idle probe: only the camera was released, the model is still loaded
+                    governor.unpark()
+                    camera.init_camera(config.RESOLUTION_ID)
+                    motion_gate.reset(settle=True)
+                    continue
                 print("Initializing Hardware & AI...")
+                service_started = True
+                governor.reset()
+                camera.set_capture_rate(governor.capture_fps())
                 camera.init_camera(config.RESOLUTION_ID)
+                motion_gate.reset(settle=True)
                 # Tracking Init is safe here now
                 tracking.init_hand_tracking(config.MODEL_COMPLEXITY)
+                if config.CURSOR_OUTPUT_HZ > 0:
+                    cursor_output.start(actions.move_cursor)
                 continue
 
             # --- NORMAL RUNNING LOGIC ---
             success, frame = camera.read_frame()
             if success:
+                frame_start = time.perf_counter()
+                # Before the frame: the motion gate inside process_frame can wake the governor
+                prev_state = governor.state
+
                 # 1. Process Frame (AI)
-                processed_frame = tracking.process_frame(frame)
+                with profiler.span("frame"):
+                    processed_frame = tracking.process_frame(frame, camera.last_frame_time)
                 
                 # 2. Power Saving / Idle Logic
-                if getattr(config, 'hand_detected', False):
-                    last_hand_time = time.time()
-                    idle_mode = False
-                else:
-                    # If no hand seen for > 2 seconds, enter low power mode
-                    idle_mode = (time.time() - last_hand_time) > 2.0
-
-                if idle_mode:
-                    time.sleep(0.1) 
+                state = governor.update(getattr(config, 'hand_detected', False))
+                if state != prev_state:
+                    camera.set_capture_rate(governor.capture_fps())
+                    motion_gate.reset()     # Frame spacing changed: compare against fresh frames
+
+                if governor.should_park_camera():
+                    camera.release_camera()
+                    actions.release_all()
+                    governor.park()
+                    # Stop or exit ends the park early
+                    events.wait(lambda: not config.running, timeout=config.GOV_PARK_SECONDS)
+                    continue
                 
                 # 3. Display Logic
                 if not config.headless_mode and processed_frame is not None:
@@ -70,17 +104,44 @@ def main_loop():
                     except Exception as e:
                         print(f"Window Close Error: {e}")
                     config.video_visible = False
+
+                # 4. Hold the governor's inference rate
+                governor.wait_next_frame(frame_start)
+
+            elif camera.is_source_finished():
+                # Replay source (video / images / synthetic) ran out: stop like the STOP button
+                print(f"[Camera] Replay finished after {camera.last_frame_seq} frames")
+                stop_service()
             
         else:
             # --- STOPPED/CLEANUP LOGIC ---
-            if camera.is_camera_active():
-                print("Shutting down Hardware...")
-                camera.release_camera()
-                cv2.destroyAllWindows()
-                actions.release_all() # Ensure clicks are released
-                config.video_visible = False
-            
-            time.sleep(0.5)
+            release_hardware()
+            # Blocks until START (or exit)
+            events.wait(lambda: config.running)
+
+    release_hardware()
+
+def release_hardware():
+    global service_started
+    governor.parked = False
+    # Keyed on the service, not the camera: a deep-idle park has already released the camera
+    if service_started:
+        service_started = False
+        print("Shutting down Hardware...")
+        if camera.is_camera_active():
+            camera.release_camera()
+        cv2.destroyAllWindows()
+        actions.release_all() # Ensure clicks are released
+        cursor_output.stop()
+        gestures.reset()
+        landmark_trace.stop_recording()
+        if config.MOTION_GATE:
+            print(f"[Gate] {motion_gate.get_stats()}")
+        if profiler.enabled:
+            profiler.print_summary()
+            profiler.export_chrome_trace()
+        config.video_visible = False
+    tracking.reset_voice_state()
 
 def toggle_headless(is_headless):
     config.headless_mode = bool(is_headless)
@@ -101,17 +162,32 @@ def restore_window(icon, item):
     gui.root.after(0, gui.root.deiconify)
 
 def quit_app(icon=None, item=None):
+    """
+    Ordered exit: settings, then the producers (camera / tracking, microphone / Whisper),
+    then the executor they feed, the keyboard, the tray and finally the Tk mainloop.
+    """
     try:
         gui.commit_settings_to_config()
     except Exception as e:
         print(f"Warning: Could not sync GUI settings: {e}")
-
-    config.save_settings()
+    config.flush_settings()
+
+    print("Shutting down...")
+    config.running = False
+    events.request_shutdown()
+    if ai_thread is not None:
+        ai_thread.join(SHUTDOWN_JOIN_S)
+    voice.stop_voice_threads(SHUTDOWN_JOIN_S)
+
+    # Let queued typing / keyboard toggles finish before the service goes away
+    executor.stop()
+    print(f"[Executor] {executor.get_stats()}")
     keyboard.cleanup()
     if icon: 
         icon.stop()
-    
-    os._exit(0)
+
+    # mainloop() returns on the Tk thread; the remaining daemon threads end with the process
+    gui.root.after(0, gui.root.quit)
 
 def toggle_voice_mode(icon, item):
     config.VOICE_ALWAYS_ON = not config.VOICE_ALWAYS_ON
@@ -131,13 +207,14 @@ def run_tray_icon():
 
 # --- Entry Point ---
 if __name__ == "__main__":
-    t_ai = threading.Thread(target=main_loop, daemon=True)
-    t_ai.start()
+    ai_thread = threading.Thread(target=main_loop, name="Tracking", daemon=True)
+    ai_thread.start()
 
     t_tray = threading.Thread(target=run_tray_icon, daemon=True)
     t_tray.start()
 
     voice.start_voice_thread()
+    config.start_watcher()
     
     app = gui.create_window(start_service, stop_service, toggle_headless)
     
@@ -147,4 +224,5 @@ if __name__ == "__main__":
     if getattr(config, 'AUTO_START', True):
         start_service()
 
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    app.destroy()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+import config
+
+# Cheap pre-inference gate used while no hand is tracked.
+# Each frame is shrunk to a tiny grayscale image and compared against a running
+# background. While the scene is static the hand model is skipped entirely; the
+# first frame with motion in (or near) the active box runs inference right away.
+
+# --- SETTINGS ---
+GATE_WIDTH = 80                 # Downscaled analysis size (keeps the gate well under 1 ms)
+GATE_HEIGHT = 60
+PIXEL_DIFF = 18                 # Gray-level change that counts as a "moving" pixel
+BACKGROUND_ALPHA = 0.05         # Running background update rate
+BOX_MARGIN = 0.25               # Extra margin around the active box, as a fraction of its size
+SETTLE_S = 0.5                  # After a camera re-open: no motion scoring while auto-exposure settles
+
+# --- STATE ---
+_small = np.empty((GATE_HEIGHT, GATE_WIDTH, 3), dtype=np.uint8)
+_gray = np.empty((GATE_HEIGHT, GATE_WIDTH), dtype=np.uint8)
+_diff = np.empty((GATE_HEIGHT, GATE_WIDTH), dtype=np.uint8)
+_bg_u8 = np.empty((GATE_HEIGHT, GATE_WIDTH), dtype=np.uint8)
+_background = np.zeros((GATE_HEIGHT, GATE_WIDTH), dtype=np.float32)
+_seeded = False
+_settling = False               # reset(settle=True) pending: the next seed starts a settle window
+_settle_until = 0.0
+_last_inference = 0.0
+
+# --- METRICS ---
+last_score = 0.0                # Fraction of moving pixels inside the watched region
+last_decision = "off"           # "seed", "settle", "skip", "motion" or "refresh"
+frames_skipped = 0
+frames_woken = 0
+frames_refreshed = 0
+
+def reset(settle=False):
+    """
+    Forget the background (tracking took over, the capture rate changed).
+    settle=True after the camera (re)opens: for SETTLE_S the background follows the
+    picture while exposure settles and every frame runs inference, so a hand already in
+    view is found at once but brightness changes can't wake the governor.
+    """
+    global _seeded, _settling
+    _seeded = False
+    _settling = settle
+
+def check(img, zone, now):
+    """
+    Decides whether this frame needs the hand model.
+    zone is the active box (x_min, y_min, x_max, y_max) in img pixels.
+    Returns True to run inference, False to skip it.
+    """
+    global _seeded, _last_inference, last_score, last_decision, _settling, _settle_until
+    global frames_skipped, frames_woken, frames_refreshed
+
+    h, w = img.shape[:2]
+    cv2.resize(img, (GATE_WIDTH, GATE_HEIGHT), dst=_small, interpolation=cv2.INTER_AREA)
+    cv2.cvtColor(_small, cv2.COLOR_BGR2GRAY, dst=_gray)
+
+    if not _seeded:
+        _background[...] = _gray
+        _seeded = True
+        _last_inference = now
+        last_score = 0.0
+        last_decision = "seed"
+        if _settling:
+            _settling = False
+            _settle_until = now + SETTLE_S
+        return True
+
+    if now < _settle_until:
+        _background[...] = _gray
+        last_score = 0.0
+        last_decision = "settle"
+        _last_inference = now
+        return True
+
+    # Watched region: active box plus margin, mapped to the small image
+    x_min, y_min, x_max, y_max = zone
+    mx = (x_max - x_min) * BOX_MARGIN
+    my = (y_max - y_min) * BOX_MARGIN
+    sx, sy = GATE_WIDTH / w, GATE_HEIGHT / h
+    x0 = int(max(0, (x_min - mx) * sx))
+    x1 = int(min(GATE_WIDTH, (x_max + mx) * sx))
+    y0 = int(max(0, (y_min - my) * sy))
+    y1 = int(min(GATE_HEIGHT, (y_max + my) * sy))
+    if x1 <= x0 or y1 <= y0:
+        x0, y0, x1, y1 = 0, 0, GATE_WIDTH, GATE_HEIGHT
+
+    cv2.convertScaleAbs(_background, dst=_bg_u8)
+    cv2.absdiff(_gray, _bg_u8, dst=_diff)
+    cv2.threshold(_diff, PIXEL_DIFF, 255, cv2.THRESH_BINARY, dst=_diff)
+    region = _diff[y0:y1, x0:x1]
+    last_score = cv2.countNonZero(region) / region.size
+    cv2.accumulateWeighted(_gray, _background, BACKGROUND_ALPHA)
+
+    if last_score >= config.MOTION_GATE_THRESHOLD:
+        last_decision = "motion"
+        frames_woken += 1
+        _last_inference = now
+        return True
+
+    # Static scene: still look occasionally, in case a hand is already resting in view
+    if now - _last_inference >= config.MOTION_GATE_REFRESH:
+        last_decision = "refresh"
+        frames_refreshed += 1
+        _last_inference = now
+        return True
+
+    last_decision = "skip"
+    frames_skipped += 1
+    return False
+
+def get_stats():
+    return {
+        "threshold": config.MOTION_GATE_THRESHOLD,
+        "score": last_score,
+        "decision": last_decision,
+        "skipped": frames_skipped,
+        "woken": frames_woken,
+        "refreshed": frames_refreshed,
+    }
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+import config
+
+# Per-stage latency tracing.
+#   with profiler.span("hands.process"):
+#       results = hands.process(imgRGB)
+# When disabled, span() returns a shared no-op object, so the cost is one
+# global lookup and an empty __enter__/__exit__ pair.
+
+# --- SETTINGS ---
+MAX_EVENTS = 20000        # Chrome trace ring (~10 minutes of a 30 fps pipeline with 10 spans)
+ROLLING_WINDOW = 600      # Samples kept per stage for percentiles
+# Histogram bucket upper edges in ms; the last bucket catches everything slower
+BUCKETS_MS = (0.5, 1, 2, 4, 8, 16, 33, 66, 133, 266)
+
+# --- STATE ---
+enabled = False
+_lock = threading.Lock()
+_events = deque(maxlen=MAX_EVENTS)
+_rolling = {}
+_histograms = {}
+_thread_names = {}
+_origin = time.perf_counter()
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "start")
+    def __init__(self, name):
+        self.name = name
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        add(self.name, self.start, time.perf_counter())
+        return False
+
+def span(name):
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+def add(name, start, end):
+    """Records a finished span given perf_counter start/end times."""
+    if not enabled:
+        return
+    dur_ms = (end - start) * 1000.0
+    tid = threading.get_ident()
+    with _lock:
+        if tid not in _thread_names:
+            _thread_names[tid] = threading.current_thread().name
+        _events.append((name, tid, start, end - start))
+        samples = _rolling.get(name)
+        if samples is None:
+            samples = _rolling[name] = deque(maxlen=ROLLING_WINDOW)
+            _histograms[name] = [0] * (len(BUCKETS_MS) + 1)
+        samples.append(dur_ms)
+        hist = _histograms[name]
+        for i, edge in enumerate(BUCKETS_MS):
+            if dur_ms <= edge:
+                hist[i] += 1
+                break
+        else:
+            hist[-1] += 1
+
+def enable(state=True):
+    global enabled
+    enabled = bool(state)
+
+def reset():
+    with _lock:
+        _events.clear()
+        _rolling.clear()
+        _histograms.clear()
+
+def summary():
+    """Per-stage rolling stats: {stage: {count, mean_ms, p50_ms, p95_ms, max_ms, histogram}}"""
+    out = {}
+    with _lock:
+        for name, samples in _rolling.items():
+            data = sorted(samples)
+            n = len(data)
+            if n == 0:
+                continue
+            out[name] = {
+                "count": n,
+                "mean_ms": sum(data) / n,
+                "p50_ms": data[n // 2],
+                "p95_ms": data[min(n - 1, int(n * 0.95))],
+                "max_ms": data[-1],
+                "histogram": list(_histograms[name]),
+            }
+    return out
+
+def print_summary():
+    stats = summary()
+    if not stats:
+        return
+    print("[Profiler] stage                     mean    p50    p95    max (ms)")
+    for name, s in sorted(stats.items()):
+        print(f"[Profiler] {name:<24} {s['mean_ms']:6.2f} {s['p50_ms']:6.2f} {s['p95_ms']:6.2f} {s['max_ms']:6.2f}")
+
+def export_chrome_trace(path=None):
+    """Writes collected spans as Chrome trace JSON (chrome://tracing, Perfetto)."""
+    path = path or config.PROFILE_TRACE_PATH
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+        names = dict(_thread_names)
+    trace = []
+    for tid, tname in names.items():
+        trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+    for name, tid, start, dur in events:
+        trace.append({
+            "name": name,
+            "ph": "X",
+            "pid": pid,
+            "tid": tid,
+            "ts": (start - _origin) * 1e6,
+            "dur": dur * 1e6,
+        })
+    try:
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        print(f"[Profiler] Chrome trace written to {path} ({len(events)} spans)")
+    except Exception as e:
+        print(f"[Profiler] Failed to write trace: {e}")
+
+enable(getattr(config, 'PROFILE_STAGES', False))
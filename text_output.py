@@ -0,0 +1,205 @@
+import sys
+import time
+import ctypes
+from ctypes import sizeof
+import config
+import executor
+from input_structs import INPUT
+
+# Dictation text output.
+# voice hands finished text to type_text(); the executor worker injects it, so the
+# decoder and the VAD loop never wait on keystrokes. A whole string goes out at once:
+#   "win32"     - one SendInput call with a KEYEVENTF_UNICODE down/up pair per character
+#   "pyautogui" - pyautogui.write, one key at a time (non-Windows fallback)
+#   "recording" - keeps every typed / pasted string in memory (tests, benchmarks)
+#   "null"      - discards everything
+# Strategies on top of any backend:
+#   TEXT_PASTE_MIN_CHARS - text at least this long is pasted through the clipboard (0 = never)
+#   TEXT_RATE_CPS        - characters per second, sent in TEXT_RATE_CHUNK pieces (0 = unlimited)
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+VK_RETURN = 0x0D
+VK_CONTROL = 0x11
+VK_V = 0x56
+
+PASTE_RESTORE_S = 0.2       # Time the target app gets to read the clipboard before it is restored
+
+backend = None
+
+# --- METRICS ---
+strings = 0
+chars = 0
+pastes = 0
+last_ms = 0.0
+max_ms = 0.0
+
+# --- BACKENDS ---
+class TextBackend:
+    """type(text) injects text at the focus; paste(text) returns False if it can't paste."""
+    name = "base"
+    def type(self, text):
+        pass
+    def paste(self, text):
+        return False
+
+class Win32TextBackend(TextBackend):
+    name = "win32"
+    def __init__(self):
+        self._send_input = ctypes.windll.user32.SendInput
+        self._size = sizeof(INPUT)
+        self._inputs = None
+        self._reserve(256)
+
+    def _reserve(self, count):
+        """Grows the reused INPUT array; dictation rarely outgrows the first one."""
+        if self._inputs is not None and len(self._inputs) >= count:
+            return
+        self._inputs = (INPUT * max(count, 2 * len(self._inputs or ())))()
+        for inp in self._inputs:
+            inp.type = INPUT_KEYBOARD
+
+    def _key(self, i, vk, scan, flags):
+        ki = self._inputs[i].ii.ki
+        ki.wVk = vk
+        ki.wScan = scan
+        ki.dwFlags = flags
+
+    def type(self, text):
+        # UTF-16 code units: characters outside the BMP go out as their surrogate pair
+        units = text.encode("utf-16-le")
+        count = len(units)      # Two inputs (down + up) per 2-byte unit
+        self._reserve(count)
+        n = 0
+        for k in range(0, len(units), 2):
+            unit = units[k] | (units[k + 1] << 8)
+            if unit == 0x0A:
+                # Newline as a real Enter key, a Unicode LF is ignored by most edit controls
+                self._key(n, VK_RETURN, 0, 0)
+                self._key(n + 1, VK_RETURN, 0, KEYEVENTF_KEYUP)
+            elif unit == 0x0D:
+                continue
+            else:
+                self._key(n, 0, unit, KEYEVENTF_UNICODE)
+                self._key(n + 1, 0, unit, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)
+            n += 2
+        if n:
+            self._send_input(n, self._inputs, self._size)
+
+    def paste(self, text):
+        return clipboard_paste(text, self._paste_keys)
+
+    def _paste_keys(self):
+        self._reserve(4)
+        self._key(0, VK_CONTROL, 0, 0)
+        self._key(1, VK_V, 0, 0)
+        self._key(2, VK_V, 0, KEYEVENTF_KEYUP)
+        self._key(3, VK_CONTROL, 0, KEYEVENTF_KEYUP)
+        self._send_input(4, self._inputs, self._size)
+
+class PyautoguiTextBackend(TextBackend):
+    name = "pyautogui"
+    def __init__(self):
+        import pyautogui
+        pyautogui.PAUSE = 0         # No sleep after every call
+        pyautogui.FAILSAFE = False  # Dictation must not abort when the cursor sits in a corner
+        self._gui = pyautogui
+    def type(self, text):
+        self._gui.write(text)
+    def paste(self, text):
+        return clipboard_paste(text, lambda: self._gui.hotkey("ctrl", "v"))
+
+class RecordingTextBackend(TextBackend):
+    """Keeps ("type", text) / ("paste", text) tuples in `typed`."""
+    name = "recording"
+    def __init__(self):
+        self.typed = []
+    def type(self, text):
+        self.typed.append(("type", text))
+    def paste(self, text):
+        self.typed.append(("paste", text))
+        return True
+
+class NullTextBackend(TextBackend):
+    name = "null"
+
+def create_backend(kind):
+    if kind == "recording":
+        return RecordingTextBackend()
+    if kind == "null":
+        return NullTextBackend()
+    if kind == "win32" or (kind == "auto" and sys.platform == "win32"):
+        return Win32TextBackend()
+    return PyautoguiTextBackend()
+
+def set_backend(new_backend):
+    global backend
+    backend = new_backend
+    print(f"[Text] Backend: {backend.name}")
+    return backend
+
+# --- CLIPBOARD ---
+def clipboard_paste(text, send_shortcut):
+    """Swaps text onto the clipboard, sends the paste shortcut, then puts the user's clipboard back."""
+    try:
+        import pyperclip
+        previous = pyperclip.paste()
+        pyperclip.copy(text)
+    except Exception as e:
+        print(f"[Text] Clipboard unavailable ({e}), typing instead")
+        return False
+    send_shortcut()
+    time.sleep(PASTE_RESTORE_S)
+    try:
+        pyperclip.copy(previous)
+    except Exception:
+        pass
+    return True
+
+# --- OUTPUT ---
+def _emit(text):
+    """Executor worker: injects one finished string with the configured strategy."""
+    global strings, chars, pastes, last_ms, max_ms
+    start = time.perf_counter()
+    if config.TEXT_PASTE_MIN_CHARS and len(text) >= config.TEXT_PASTE_MIN_CHARS and backend.paste(text):
+        pastes += 1
+    elif config.TEXT_RATE_CPS > 0:
+        # Apps that drop bursts: small pieces at a steady rate
+        step = max(1, config.TEXT_RATE_CHUNK)
+        delay = step / config.TEXT_RATE_CPS
+        for i in range(0, len(text), step):
+            if i:
+                time.sleep(delay)
+            backend.type(text[i:i + step])
+    else:
+        backend.type(text)
+    strings += 1
+    chars += len(text)
+    last_ms = (time.perf_counter() - start) * 1000.0
+    max_ms = max(max_ms, last_ms)
+
+def type_text(text):
+    """Queues text for injection at the focus. Never blocks the caller."""
+    if text:
+        executor.submit("type", _emit, text)
+
+def get_stats():
+    return {
+        "backend": backend.name if backend else None,
+        "strings": strings,
+        "chars": chars,
+        "pastes": pastes,
+        "last_ms": round(last_ms, 2),
+        "max_ms": round(max_ms, 2),
+    }
+
+def init():
+    kind = config.TEXT_BACKEND
+    try:
+        return set_backend(create_backend(kind))
+    except Exception as e:
+        print(f"[Text] Backend '{kind}' failed: {e}")
+        return set_backend(NullTextBackend())
+
+init()
@@ -19,6 +19,9 @@ TOUCH_MASK_ALL = 0x00000007
 
 PT_TOUCH = 0x00000002
 
+DOWN_FLAGS = POINTER_FLAG_DOWN | POINTER_FLAG_INRANGE | POINTER_FLAG_INCONTACT
+UPDATE_FLAGS = POINTER_FLAG_UPDATE | POINTER_FLAG_INRANGE | POINTER_FLAG_INCONTACT
+
 # --- STRUCTS (Strictly following your working example) ---
 class POINTER_INFO(Structure):
     _fields_ = [
@@ -51,40 +54,98 @@ class POINTER_TOUCH_INFO(Structure):
         ("pressure", c_uint32)
     ]
 
-# --- SETUP ---
-user32 = ctypes.windll.user32
-InitializeTouchInjection = getattr(user32, "InitializeTouchInjection", None)
-InjectTouchInput = getattr(user32, "InjectTouchInput", None)
+CONTACT_SIZE = sizeof(POINTER_TOUCH_INFO)
 
 # --- GLOBAL STATE ---
 TOUCH_AVAILABLE = False
-MAX_TOUCHES = 2
+MAX_TOUCHES = 10   # Windows touch injection limit; IDs 0..MAX_TOUCHES-1
+
+# Persistent contact state, one struct per pointer ID, updated in place.
+contacts = (POINTER_TOUCH_INFO * MAX_TOUCHES)()
+# Packed batch handed to InjectTouchInput: only the contacts with flags, no holes (Error 87).
+batch = (POINTER_TOUCH_INFO * MAX_TOUCHES)()
+# Raw addresses so packing is a memmove per contact, with no ctypes objects created per frame
+_contact_addrs = [addressof(contacts) + i * CONTACT_SIZE for i in range(MAX_TOUCHES)]
+_batch_addr = addressof(batch)
+# Python mirror of each contact's pointerFlags (avoids nested struct attribute lookups)
+_flags = [POINTER_FLAG_NONE] * MAX_TOUCHES
+_batch_ids = [0] * MAX_TOUCHES
+
+# --- INJECTION BACKENDS ---
+class TouchBackend:
+    """Receives a packed batch of `count` contacts at `address` once per frame."""
+    name = "base"
+    def initialize(self, max_contacts):
+        return False
+    def inject(self, address, count):
+        return False
+
+class Win32TouchBackend(TouchBackend):
+    name = "win32"
+    def __init__(self):
+        user32 = ctypes.windll.user32
+        self._init = getattr(user32, "InitializeTouchInjection", None)
+        self._inject = getattr(user32, "InjectTouchInput", None)
+        self._get_error = ctypes.windll.kernel32.GetLastError
+        if self._inject:
+            # The batch goes in as a raw address: without argtypes ctypes would pass a 32-bit int
+            self._inject.argtypes = (c_uint32, c_void_p)
+            self._inject.restype = BOOL
+
+    def initialize(self, max_contacts):
+        if not self._init or not self._inject:
+            print("[Touch] API Not Found")
+            return False
+        # 1 = TOUCH_FEEDBACK_DEFAULT
+        if not self._init(max_contacts, 1):
+            print("[Touch] Initialize Failed")
+            return False
+        return True
+
+    def inject(self, address, count):
+        if self._inject(count, address):
+            return True
+        # Debugging Error 87
+        err = self._get_error()
+        if err != 0:
+            print(f"[Touch Error] Code: {err} | Count: {count}")
+        return False
+
+class NullTouchBackend(TouchBackend):
+    """Accepts and discards every batch (benchmarks the engine itself)."""
+    name = "null"
+    def __init__(self):
+        self.frames = 0
+        self.contacts = 0
+    def initialize(self, max_contacts):
+        return True
+    def inject(self, address, count):
+        self.frames += 1
+        self.contacts += count
+        return True
 
-# We keep a persistent object for every possible ID (0-9)
-# so we can track state (UP/DOWN) for each finger independently.
-touch_map = {} 
+backend = None
 
-def initialize():
-    global TOUCH_AVAILABLE, touch_map
-    
-    # Pre-allocate structs for IDs 0 to MAX_TOUCHES
+def set_backend(new_backend):
+    """Swaps the injection backend (input_backend does this) and resets every contact."""
+    global backend, TOUCH_AVAILABLE
+    backend = new_backend
     for i in range(MAX_TOUCHES):
-        p_info = POINTER_INFO(pointerType=PT_TOUCH, pointerId=i, pointerFlags=POINTER_FLAG_NONE)
-        t_info = POINTER_TOUCH_INFO(pointerInfo=p_info, touchMask=TOUCH_MASK_ALL)
-        touch_map[i] = t_info
-
-    if InitializeTouchInjection:
-        # Initialize for max touches
-        if InitializeTouchInjection(MAX_TOUCHES, 1): # 1 = TOUCH_FEEDBACK_DEFAULT
-            TOUCH_AVAILABLE = True
-            print("[Touch] Engine Initialized Successfully")
-        else:
-            print("[Touch] Initialize Failed")
-    else:
-        print("[Touch] API Not Found")
+        ti = contacts[i]
+        ti.pointerInfo.pointerType = PT_TOUCH
+        ti.pointerInfo.pointerId = i
+        ti.pointerInfo.pointerFlags = POINTER_FLAG_NONE
+        ti.touchMask = TOUCH_MASK_ALL
+        ti.pressure = 32000
+        ti.orientation = 90
+        _flags[i] = POINTER_FLAG_NONE
 
-# Initialize on import
-initialize()
+    TOUCH_AVAILABLE = backend is not None and backend.initialize(MAX_TOUCHES)
+    if TOUCH_AVAILABLE:
+        print(f"[Touch] Engine Initialized Successfully ({backend.name}, {MAX_TOUCHES} contacts)")
+    elif backend is None:
+        print("[Touch] Not supported by this input backend, using mouse fallback")
+    return TOUCH_AVAILABLE
 
 def update_touch(pointer_id, x, y, is_down):
     """
@@ -92,80 +153,69 @@ def update_touch(pointer_id, x, y, is_down):
     Does NOT inject yet.
     """
     if not TOUCH_AVAILABLE: return False
-    
+
     if pointer_id >= MAX_TOUCHES: return False
 
-    ti = touch_map[pointer_id]
-    
+    ti = contacts[pointer_id]
+
     # Determine current state to calculate correct flags
     # We check if the previous flag had DOWN or INCONTACT
-    was_down = (ti.pointerInfo.pointerFlags & POINTER_FLAG_INCONTACT) != 0
+    was_down = (_flags[pointer_id] & POINTER_FLAG_INCONTACT) != 0
 
     if is_down:
-        if not was_down:
-            flags = POINTER_FLAG_DOWN | POINTER_FLAG_INRANGE | POINTER_FLAG_INCONTACT
-        else:
-            flags = POINTER_FLAG_UPDATE | POINTER_FLAG_INRANGE | POINTER_FLAG_INCONTACT
-            
-        ti.pointerInfo.ptPixelLocation.x = int(x)
-        ti.pointerInfo.ptPixelLocation.y = int(y)
-        
+        flags = UPDATE_FLAGS if was_down else DOWN_FLAGS
+        ix = int(x)
+        iy = int(y)
+        pi = ti.pointerInfo
+        pi.ptPixelLocation.x = ix
+        pi.ptPixelLocation.y = iy
+
         # Update Contact Area (Simple 2px box)
-        ti.rcContact.left = int(x) - 2
-        ti.rcContact.right = int(x) + 2
-        ti.rcContact.top = int(y) - 2
-        ti.rcContact.bottom = int(y) + 2
-        
-        ti.pressure = 32000
-        ti.orientation = 90
-        ti.pointerInfo.pointerFlags = flags
-        
+        rc = ti.rcContact
+        rc.left = ix - 2
+        rc.right = ix + 2
+        rc.top = iy - 2
+        rc.bottom = iy + 2
+
+    elif was_down:
+        # Transition to UP
+        flags = POINTER_FLAG_UP
     else:
-        if was_down:
-            # Transition to UP
-            ti.pointerInfo.pointerFlags = POINTER_FLAG_UP
-        else:
-            # Already UP, reset to NONE so we don't send it
-            ti.pointerInfo.pointerFlags = POINTER_FLAG_NONE
+        # Already UP, reset to NONE so we don't send it
+        flags = POINTER_FLAG_NONE
 
+    if flags != _flags[pointer_id]:
+        ti.pointerInfo.pointerFlags = flags
+        _flags[pointer_id] = flags
     return True
 
 def process_frame():
     """
-    Packs all active touches into a contiguous array and injects them.
+    Packs all active touches into the contiguous batch buffer and injects them.
     Must be called once per frame.
     """
     if not TOUCH_AVAILABLE: return False
 
-    # 1. FILTER: Collect only touches that have actual flags (DOWN, UPDATE, UP)
-    # We ignore any touch with POINTER_FLAG_NONE (0)
-    active_contacts = []
+    # 1. PACK: copy only contacts with actual flags (DOWN, UPDATE, UP), no holes
+    count = 0
     for i in range(MAX_TOUCHES):
-        if touch_map[i].pointerInfo.pointerFlags != POINTER_FLAG_NONE:
-            active_contacts.append(touch_map[i])
+        if _flags[i] != POINTER_FLAG_NONE:
+            memmove(_batch_addr + count * CONTACT_SIZE, _contact_addrs[i], CONTACT_SIZE)
+            _batch_ids[count] = i
+            count += 1
 
-    count = len(active_contacts)
     if count == 0:
         return True
 
-    # 2. PACK: Create a C-Array of exactly 'count' length
-    # This solves Error 87. Windows receives a tight array with no "holes".
-    contact_array = (POINTER_TOUCH_INFO * count)(*active_contacts)
-
-    # 3. INJECT
-    result = InjectTouchInput(count, byref(contact_array[0]))
-
-    if result:
-        # 4. CLEANUP: Reset UP flags to NONE
-        # If we just sent an UP signal, next frame this finger should be invisible (NONE)
-        for contact in active_contacts:
-            if contact.pointerInfo.pointerFlags & POINTER_FLAG_UP:
-                # Update the source map, not just the temp array
-                touch_map[contact.pointerInfo.pointerId].pointerInfo.pointerFlags = POINTER_FLAG_NONE
-        return True
-    else:
-        # Debugging Error 87
-        err = ctypes.windll.kernel32.GetLastError()
-        if err != 0:
-            print(f"[Touch Error] Code: {err} | Count: {count}")
-        return False
\ No newline at end of file
+    # 2. INJECT
+    if not backend.inject(_batch_addr, count):
+        return False
+
+    # 3. CLEANUP: Reset UP flags to NONE
+    # If we just sent an UP signal, next frame this finger should be invisible (NONE)
+    for k in range(count):
+        i = _batch_ids[k]
+        if _flags[i] == POINTER_FLAG_UP:
+            contacts[i].pointerInfo.pointerFlags = POINTER_FLAG_NONE
+            _flags[i] = POINTER_FLAG_NONE
+    return True
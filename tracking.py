@@ -1,61 +1,288 @@
 import cv2
-import mediapipe as mp
 import math
+import numpy as np
 import time
 import config
 import actions
+import landmark_trace
+import profiler
+import motion_gate
+import governor
+import cursor_filter
+import gestures
+import events
 
 # --- CONFIGURATION ---
-mp_hands = mp.solutions.hands
 hands = None
 pTime = 0
 
-# --- VOICE STABILITY ---
-voice_grace = 0
-VOICE_MAX_GRACE = 20 
-
 # --- MIDDLE FINGER STABILITY ---
 plocMidX, plocMidY = 0, 0
 mid_track_active = False 
 
-# HYSTERESIS VARIABLES
-middle_grace = 0
-MIDDLE_GRACE_MAX = 5  # Must hold straight for 5 frames to engage
+# --- SETTINGS ---
+# One immutable config snapshot per frame; the caches below are invalidated by
+# config change notifications instead of re-checking their inputs every frame.
+cfg = config.snapshot()
+MAPPING_SETTINGS = ("SENSITIVITY", "BOX_OFFSET_X", "BOX_OFFSET_Y")
+FILTER_SETTINGS = ("CURSOR_FILTER", "SMOOTHING", "ONE_EURO_MIN_CUTOFF", "ONE_EURO_BETA",
+                   "KALMAN_PROCESS_NOISE", "KALMAN_MEASUREMENT_NOISE")
+
+# --- CURSOR FILTERS (Index + Middle tracks) ---
+index_filter = None
+middle_filter = None
+_filters_dirty = True
+pipeline_latency = 0.0      # Smoothed capture -> gesture-stage delay (s), drives prediction
+LATENCY_EMA = 0.1
 is_dual_mode_active = False
+_voice_state = (False, False, False)   # (hand, voice gesture, voice_near) last published on the bus
+
+# --- ROI TRACKING ---
+# Once a hand is locked only a padded square around it is sent to MediaPipe,
+# resized to a fixed input so preprocessing cost no longer scales with resolution.
+ROI_INPUT_SIZE = 256
+ROI_MIN_SIZE = 160          # Smallest crop side in frame pixels (far away hands)
+roi_box = None              # (x0, y0, side) in flipped-frame pixels, None = full-frame search
+roi_rgb = np.empty((ROI_INPUT_SIZE, ROI_INPUT_SIZE, 3), dtype=np.uint8)  # Reused RGB crop buffer
+
+# --- LANDMARK GEOMETRY ---
+# One hand lives in two preallocated float32 arrays that are overwritten in place
+# every frame; all gesture measurements come from a few vectorized ops on them.
+NUM_LANDMARKS = 21
+lm_norm = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)  # MediaPipe output, normalized
+lm_px = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)    # Same hand in frame pixels
+
+# Distance pairs measured in one pass (squared, x/y only)
+DIST_A = np.array([5, 10, 20])   # Index MCP, middle PIP, pinky tip
+DIST_B = np.array([0, 4, 4])     # Wrist, thumb tip, thumb tip
+D_HAND, D_PINCH, D_VOICE = 0, 1, 2
+_dist_a = np.zeros((len(DIST_A), 3), dtype=np.float32)
+_dist_b = np.zeros((len(DIST_B), 3), dtype=np.float32)
+dist_sq = np.zeros(len(DIST_A), dtype=np.float32)
+
+# "Finger raised" checks: y[RISE_A] - y[RISE_B] > RISE_MARGIN (screen y grows downwards)
+RISE_A = np.array([10, 8, 18])   # Middle PIP, index tip, pinky PIP
+RISE_B = np.array([12, 12, 20])  # Middle tip, middle tip, pinky tip
+RISE_MARGIN = np.array([10, 0, 10], dtype=np.float32)
+R_MID_ABOVE_PIP, R_MID_ABOVE_INDEX, R_PINKY = 0, 1, 2
+_rise_a = np.zeros(len(RISE_A), dtype=np.float32)
+_rise_b = np.zeros(len(RISE_B), dtype=np.float32)
+rise = np.zeros(len(RISE_A), dtype=bool)
 
-def get_dist_sq(p1, p2):
-    return (p1[0] - p2[0])**2 + (p1[1] - p2[1])**2
+# Gesture distance conditions: pinch close, pinch held, voice, voice near (see gestures.CONDITIONS)
+GESTURE_DIST_IDS = np.array([D_PINCH, D_PINCH, D_VOICE, D_VOICE])
+_gesture_dist = np.zeros(len(GESTURE_DIST_IDS), dtype=np.float32)
+_gesture_thresh = np.zeros(len(GESTURE_DIST_IDS), dtype=np.float32)
+
+# Fingertips mapped to the screen in one affine transform
+TIP_IDS = np.array([8, 12])      # Index tip, middle tip
+_tips = np.zeros((len(TIP_IDS), 3), dtype=np.float32)
+screen_pts = np.zeros((len(TIP_IDS), 2), dtype=np.float32)
+
+# Cached per (resolution, screen size); MAPPING_SETTINGS changes mark it dirty
+_mapping_key = None
+_mapping_dirty = True
+zone = (0, 0, 1, 1)
+_frame_scale = np.ones(3, dtype=np.float32)
+_affine_lin = np.eye(2, dtype=np.float32)     # Transposed 2x2 part, so points @ _affine_lin
+_affine_off = np.zeros(2, dtype=np.float32)
+_screen_max = np.ones(2, dtype=np.float32)
+
+def close_hand_tracking():
+    """Frees the MediaPipe graph (re-inits, benchmark runs)."""
+    global hands
+    if hands is not None:
+        hands.close()
+        hands = None
 
 def init_hand_tracking(complexity=0):
     global hands
+    # Imported here so landmark trace replay can run without MediaPipe installed
+    import mediapipe as mp
+    close_hand_tracking()
     print(f"[Tracking] Initializing Hand Tracking (Complexity: {complexity})...")
-    hands = mp_hands.Hands(
+    hands = mp.solutions.hands.Hands(
         max_num_hands=1,
         model_complexity=complexity,
         min_detection_confidence=0.7,
         min_tracking_confidence=0.7
     )
 
-def map_range(x, in_min, in_max, out_min, out_max):
-    val = (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
-    return max(out_min, min(out_max, val))
+def active_zone(w, h):
+    """The 16:9 box (x_min, y_min, x_max, y_max) in frame pixels that maps onto the screen."""
+    avail_w = w - (2 * cfg.SENSITIVITY)
+    avail_h = h - (2 * cfg.SENSITIVITY)
+    if avail_w < 10: avail_w = 10
+    if avail_h < 10: avail_h = 10
+
+    target_ratio = 16 / 9
+    box_w = avail_w
+    box_h = box_w / target_ratio
+    if box_h > avail_h:
+        box_h = avail_h
+        box_w = box_h * target_ratio
+
+    center_x = (w // 2) + cfg.BOX_OFFSET_X
+    center_y = (h // 2) + cfg.BOX_OFFSET_Y
+    half_w = int(box_w / 2)
+    half_h = int(box_h / 2)
+
+    return (center_x - half_w, center_y - half_h, center_x + half_w, center_y + half_h)
+
+def update_mapping(w, h):
+    """Rebuilds the cached zone and frame->screen affine only when an input changed."""
+    global _mapping_key, _mapping_dirty, zone
+    key = (w, h, config.wScr, config.hScr)
+    if key == _mapping_key and not _mapping_dirty:
+        return
+    _mapping_key = key
+    _mapping_dirty = False
+    zone = active_zone(w, h)
+    x_min, y_min, x_max, y_max = zone
+    sx = config.wScr / (x_max - x_min)
+    sy = config.hScr / (y_max - y_min)
+    _affine_lin[...] = ((sx, 0.0), (0.0, sy))
+    _affine_off[...] = (-x_min * sx, -y_min * sy)
+    _screen_max[...] = (config.wScr, config.hScr)
+    _frame_scale[...] = (w, h, w)
+
+def measure_hand(lm):
+    """Fills dist_sq, rise and screen_pts for a hand in pixel coordinates."""
+    np.take(lm, DIST_A, axis=0, out=_dist_a)
+    np.take(lm, DIST_B, axis=0, out=_dist_b)
+    np.subtract(_dist_a, _dist_b, out=_dist_a)
+    np.einsum('ij,ij->i', _dist_a[:, :2], _dist_a[:, :2], out=dist_sq)
+
+    ys = lm[:, 1]
+    np.take(ys, RISE_A, out=_rise_a)
+    np.take(ys, RISE_B, out=_rise_b)
+    np.subtract(_rise_a, _rise_b, out=_rise_a)
+    np.greater(_rise_a, RISE_MARGIN, out=rise)
+
+    np.take(lm, TIP_IDS, axis=0, out=_tips)
+    np.matmul(_tips[:, :2], _affine_lin, out=screen_pts)
+    np.add(screen_pts, _affine_off, out=screen_pts)
+    np.clip(screen_pts, 0.0, _screen_max, out=screen_pts)
+
+def detect_full_frame(img):
+    """Runs the hand model on the whole (flipped) frame."""
+    with profiler.span("cvtColor"):
+        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    with profiler.span("hands.process"):
+        results = hands.process(imgRGB)
+
+    if not results.multi_hand_landmarks:
+        return []
+    # max_num_hands=1, so only the first hand is ever used
+    lm_norm[...] = [(lm.x, lm.y, lm.z) for lm in results.multi_hand_landmarks[0].landmark]
+    return [lm_norm]
+
+def detect_in_roi(img, box):
+    """
+    Runs the hand model on a fixed-size crop and maps the landmarks back to
+    normalized full-frame coordinates. Returns [] if the hand left the crop.
+    """
+    h, w = img.shape[:2]
+    x0, y0, side = box
+    with profiler.span("cvtColor"):
+        crop = img[y0:y0 + side, x0:x0 + side]
+        crop = cv2.resize(crop, (ROI_INPUT_SIZE, ROI_INPUT_SIZE), interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=roi_rgb)
+    with profiler.span("hands.process"):
+        results = hands.process(roi_rgb)
+
+    if not results.multi_hand_landmarks:
+        return []
+    lm_norm[...] = [(lm.x, lm.y, lm.z) for lm in results.multi_hand_landmarks[0].landmark]
+    sx = side / w
+    lm_norm *= (sx, side / h, sx)
+    lm_norm[:, 0] += x0 / w
+    lm_norm[:, 1] += y0 / h
+    return [lm_norm]
+
+def roi_from_landmarks(landmarks, w, h):
+    """Square crop (x0, y0, side) in pixels around the landmark bounding box, padded and clamped."""
+    xs = landmarks[:, 0]
+    ys = landmarks[:, 1]
+    bx0, bx1 = float(xs.min()) * w, float(xs.max()) * w
+    by0, by1 = float(ys.min()) * h, float(ys.max()) * h
+    side = max(bx1 - bx0, by1 - by0) * (1.0 + 2 * cfg.ROI_PADDING)
+    side = int(min(max(side, ROI_MIN_SIZE), w, h))
+    cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+    x0 = int(min(max(cx - side / 2, 0), w - side))
+    y0 = int(min(max(cy - side / 2, 0), h - side))
+    return (x0, y0, side)
+
+def ensure_filters():
+    """(Re)builds both cursor filters when the filter type, SMOOTHING or a filter constant changes."""
+    global index_filter, middle_filter, _filters_dirty
+    if not _filters_dirty:
+        return
+    _filters_dirty = False
+    index_filter = cursor_filter.create_filter()
+    middle_filter = cursor_filter.create_filter()
+    index_filter.reset(config.plocX, config.plocY)
+    middle_filter.reset(plocMidX, plocMidY)
+
+def filter_point(f, x, y, timestamp):
+    """Filters one track and applies latency prediction if enabled."""
+    fx, fy = f.update(x, y, timestamp)
+    if cfg.CURSOR_PREDICTION:
+        horizon = min(pipeline_latency, cfg.CURSOR_PREDICT_MAX_MS / 1000.0)
+        fx, fy = f.predict(horizon)
+        fx = min(max(fx, 0), config.wScr)
+        fy = min(max(fy, 0), config.hScr)
+    return fx, fy
+
+def _invalidate_mapping(changed):
+    global _mapping_dirty
+    _mapping_dirty = True
+
+def _invalidate_filters(changed):
+    global _filters_dirty
+    _filters_dirty = True
+
+config.subscribe(_invalidate_mapping, MAPPING_SETTINGS)
+config.subscribe(_invalidate_filters, FILTER_SETTINGS)
+
+def process_frame(img, timestamp=None):
+    global pTime, roi_box, pipeline_latency, cfg
 
-def process_frame(img):
-    global pTime, voice_grace
-    global plocMidX, plocMidY, mid_track_active
-    global middle_grace, is_dual_mode_active
-    
     if not hands: 
         return None if config.headless_mode else img
 
-    # --- 1. FLIP & PROCESS ---
-    img = cv2.flip(img, 1) 
+    if timestamp is None:
+        timestamp = time.perf_counter()
+    cfg = config.snapshot()
+
+    # --- 1. FLIP ---
+    with profiler.span("flip"):
+        img = cv2.flip(img, 1) 
     h, w, c = img.shape
-    imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = hands.process(imgRGB)
+    update_mapping(w, h)
 
-    config.hand_detected = False
-    gesture_seen_now = False
+    # --- 2. MOTION GATE (Only while searching for a hand) ---
+    run_model = True
+    if cfg.MOTION_GATE and roi_box is None and not config.hand_detected:
+        with profiler.span("motion_gate"):
+            run_model = motion_gate.check(img, zone, timestamp)
+        if run_model and motion_gate.last_decision == "motion":
+            governor.wake()
+    else:
+        motion_gate.reset()
+
+    # --- 3. INFERENCE (Crop around the last hand, or the whole frame) ---
+    hand_list = []
+    if run_model and cfg.ROI_TRACKING and roi_box is not None:
+        hand_list = detect_in_roi(img, roi_box)
+    if run_model and not hand_list:
+        # Hand lost (or ROI off): full-frame search on this same frame
+        hand_list = detect_full_frame(img)
+
+    if cfg.ROI_TRACKING and hand_list:
+        roi_box = roi_from_landmarks(hand_list[0], w, h)
+    else:
+        roi_box = None
 
     # FPS Calc
     display_img = None
@@ -65,161 +292,174 @@ def process_frame(img):
         fps = 1 / (cTime - pTime) if (cTime - pTime) > 0 else 0
         pTime = cTime
         cv2.putText(display_img, f"FPS: {int(fps)}", (20, 50), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
+        if cfg.MOTION_GATE and roi_box is None:
+            cv2.putText(display_img, f"GATE {motion_gate.last_score:.3f}/{cfg.MOTION_GATE_THRESHOLD:.3f} {motion_gate.last_decision}",
+                        (20, 80), cv2.FONT_HERSHEY_PLAIN, 1.2, (200, 200, 0), 1)
+        if roi_box is not None:
+            rx, ry, rs = roi_box
+            cv2.rectangle(display_img, (rx, ry), (rx + rs, ry + rs), (255, 128, 0), 1)
 
-    # --- CALCULATE 16:9 ACTIVE ZONE ---
-    avail_w = w - (2 * config.SENSITIVITY)
-    avail_h = h - (2 * config.SENSITIVITY)
-    if avail_w < 10: avail_w = 10
-    if avail_h < 10: avail_h = 10
+    # Capture -> here latency, compensated by cursor prediction
+    pipeline_latency += LATENCY_EMA * ((time.perf_counter() - timestamp) - pipeline_latency)
 
-    target_ratio = 16 / 9
-    box_w = avail_w
-    box_h = box_w / target_ratio
-    if box_h > avail_h:
-        box_h = avail_h
-        box_w = box_h * target_ratio
+    with profiler.span("gestures"):
+        process_landmarks(hand_list, w, h, display_img, timestamp)
 
-    center_x = (w // 2) + config.BOX_OFFSET_X
-    center_y = (h // 2) + config.BOX_OFFSET_Y
-    half_w = int(box_w / 2)
-    half_h = int(box_h / 2)
+    # --- 4. OPTIONAL TRACE RECORDING ---
+    if cfg.RECORD_LANDMARKS:
+        landmark_trace.record(hand_list, w, h, timestamp)
 
-    x_min = center_x - half_w
-    x_max = center_x + half_w
-    y_min = center_y - half_h
-    y_max = center_y + half_h
-    # ------------------------------------
-
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            lmList = []
-            for lm in hand_landmarks.landmark:
-                lmList.append([int(lm.x * w), int(lm.y * h)])
-
-            if lmList:
-                hand_size_sq = get_dist_sq(lmList[5], lmList[0])
-                if hand_size_sq < 900: continue 
-                
-                config.hand_detected = True
-
-                # Key Landmarks
-                x_thumb, y_thumb = lmList[4]
-                x_index_tip, y_index_tip = lmList[8]
-                x_mid_pip, y_mid_pip = lmList[10]
-                x_mid_tip, y_mid_tip = lmList[12]
-                x_pinky_pip, y_pinky_pip = lmList[18]
-                x_pinky_tip, y_pinky_tip = lmList[20]
-                
-                # --- A. DETECT GESTURES ---
-                
-                # 1. Middle Finger Straight? (Tip above PIP)
-                raw_middle_straight = (y_mid_tip < y_mid_pip - 10) and (y_mid_tip < y_index_tip)
-                
-                # STABILITY LOGIC:
-                if raw_middle_straight:
-                    if middle_grace < MIDDLE_GRACE_MAX:
-                        middle_grace += 1
-                else:
-                    if middle_grace > 0:
-                        middle_grace -= 1
-                
-                # Only activate Dual Mode if we are saturated
-                is_dual_mode_active = (middle_grace >= MIDDLE_GRACE_MAX)
-                
-                # 2. Pinky Finger Straight? (Keyboard Toggle)
-                is_pinky_straight = (y_pinky_tip < y_pinky_pip - 10)
-                config.pinky_bent = is_pinky_straight
-
-                # --- B. INDEX FINGER LOCATION ---
-                x3 = map_range(x_index_tip, x_min, x_max, 0, config.wScr)
-                y3 = map_range(y_index_tip, y_min, y_max, 0, config.hScr)
-                
-                move_delta_sq = (x3 - config.plocX)**2 + (y3 - config.plocY)**2
-                if move_delta_sq > 4.0:
-                    clocX = config.plocX + (x3 - config.plocX) / config.SMOOTHING
-                    clocY = config.plocY + (y3 - config.plocY) / config.SMOOTHING
-                else:
-                    clocX, clocY = config.plocX, config.plocY
-                config.plocX, config.plocY = clocX, clocY
-
-                # --- C. MIDDLE FINGER LOCATION (Conditional) ---
-                clocMidX, clocMidY = 0, 0
-                
-                if is_dual_mode_active:
-                    mx3 = map_range(x_mid_tip, x_min, x_max, 0, config.wScr)
-                    my3 = map_range(y_mid_tip, y_min, y_max, 0, config.hScr)
-                    
-                    if not mid_track_active:
-                         plocMidX, plocMidY = mx3, my3
-                    
-                    mid_track_active = True
-                    
-                    mid_delta_sq = (mx3 - plocMidX)**2 + (my3 - plocMidY)**2
-                    if mid_delta_sq > 4.0:
-                        clocMidX = plocMidX + (mx3 - plocMidX) / config.SMOOTHING
-                        clocMidY = plocMidY + (my3 - plocMidY) / config.SMOOTHING
-                    else:
-                        clocMidX, clocMidY = plocMidX, plocMidY
-                    plocMidX, plocMidY = clocMidX, clocMidY
-                else:
-                    mid_track_active = False
-
-                # --- D. PINCH DETECTION ---
-                real_hand_size = math.sqrt(hand_size_sq)
-                scale = 1.0 + ((real_hand_size / w / 0.15) - 1.0) * config.DEPTH_SCALE
-                dist_sq = get_dist_sq(lmList[10], lmList[4]) 
-                active_thresh_sq = (config.CLICK_DIST * scale)**2
-                release_thresh_sq = (config.RELEASE_DIST * scale)**2
-
-                if not config.dragging:
-                    if dist_sq < active_thresh_sq:
-                        config.dragging = True 
-                else:
-                    if dist_sq > release_thresh_sq:
-                        config.dragging = False 
-                
-                # --- E. EXECUTE ACTIONS ---
-                actions.handle_input(
-                    clocX, clocY,           
-                    clocMidX, clocMidY,     
-                    config.dragging,        
-                    is_dual_mode_active # <--- Now uses the Stabilized Boolean
-                )
-
-                # --- VOICE ---
-                voice_dist_sq = get_dist_sq(lmList[20], lmList[4])
-                gesture_seen_now = (voice_dist_sq < (config.CLICK_DIST * scale * 1.2)**2)
-
-                # --- VISUALS ---
-                if display_img is not None:
-                    # Box
-                    draw_x1 = int(max(0, min(w, x_min)))
-                    draw_y1 = int(max(0, min(h, y_min)))
-                    draw_x2 = int(max(0, min(w, x_max)))
-                    draw_y2 = int(max(0, min(h, y_max)))
-                    cv2.rectangle(display_img, (draw_x1, draw_y1), (draw_x2, draw_y2), (255, 255, 255), 2)
-
-                    # Index
-                    cv2.circle(display_img, (x_index_tip, y_index_tip), 8, (0, 255, 255), cv2.FILLED)
-                    
-                    # Middle (Only draw if active)
-                    if is_dual_mode_active:
-                        cv2.circle(display_img, (x_mid_tip, y_mid_tip), 8, (255, 0, 0), cv2.FILLED)
-
-                    # Pinch Line
-                    color = (0, 255, 0) if config.dragging else (0, 0, 255)
-                    cv2.line(display_img, (x_thumb, y_thumb), (x_mid_pip, y_mid_pip), color, 2)
-                    
-                    if getattr(config, 'keyboard_triggered', False):
-                        cv2.putText(display_img, "KEYBOARD", (x_mid_tip, y_mid_tip-20), cv2.FONT_HERSHEY_PLAIN, 1.5, (255,0,255), 2)
-
-    # --- VOICE HYSTERESIS ---
-    if gesture_seen_now:
-        voice_grace = VOICE_MAX_GRACE
-    else:
-        if voice_grace > 0:
-            voice_grace -= 1
-    config.voice_active_gesture = (voice_grace > 0)
+    return display_img
+
+def reset_pipeline():
+    """Fresh tracking state so a replay or benchmark run doesn't inherit a locked ROI, filter history or held gestures."""
+    global roi_box, _filters_dirty, mid_track_active, pipeline_latency, is_dual_mode_active
+    actions.release_all()
+    gestures.reset()
+    motion_gate.reset()
+    roi_box = None
+    _filters_dirty = True
+    mid_track_active = False
+    pipeline_latency = 0.0
+    is_dual_mode_active = False
+    config.hand_detected = False
+    config.dragging = False
+    config.plocX, config.plocY = 0, 0
+
+def reset_voice_state():
+    """Service stopped: no frame will clear the hand / voice gesture flags, so clear them here."""
+    global _voice_state
+    if _voice_state == (False, False, False) and not (config.hand_detected or config.voice_active_gesture):
+        return
+    # A stop mid-gesture must not keep the mic open
+    config.hand_detected = False
+    config.voice_active_gesture = False
+    _voice_state = (False, False, False)
+    events.publish(events.GESTURE)
+
+def process_landmarks(hand_list, w, h, display_img=None, timestamp=None):
+    """
+    Everything downstream of inference: gestures, cursor, clicks, voice trigger.
+    hand_list holds one entry per hand, each 21 normalized (x, y, z) landmarks.
+    Shared by the live pipeline and landmark_trace replay.
+    """
+    global plocMidX, plocMidY, mid_track_active
+    global is_dual_mode_active, cfg, _voice_state
+
+    config.hand_detected = False
+
+    if timestamp is None:
+        timestamp = time.perf_counter()
+    cfg = config.snapshot()
+    update_mapping(w, h)
+    ensure_filters()
+    x_min, y_min, x_max, y_max = zone
+
+    for hand_landmarks in hand_list:
+        np.multiply(hand_landmarks, _frame_scale, out=lm_px)
+        measure_hand(lm_px)
+
+        hand_size_sq = float(dist_sq[D_HAND])
+        if hand_size_sq < 900: continue 
+        
+        config.hand_detected = True
+
+        # Key Landmarks (pixel ints, for drawing)
+        if display_img is not None:
+            x_thumb, y_thumb = int(lm_px[4, 0]), int(lm_px[4, 1])
+            x_index_tip, y_index_tip = int(lm_px[8, 0]), int(lm_px[8, 1])
+            x_mid_pip, y_mid_pip = int(lm_px[10, 0]), int(lm_px[10, 1])
+            x_mid_tip, y_mid_tip = int(lm_px[12, 0]), int(lm_px[12, 1])
+        
+        # --- A. DETECT GESTURES ---
+        # Hand scale makes the pinch thresholds depth independent
+        real_hand_size = math.sqrt(hand_size_sq)
+        scale = 1.0 + ((real_hand_size / w / 0.15) - 1.0) * cfg.DEPTH_SCALE
+        click_px = cfg.CLICK_DIST * scale
+        release_px = cfg.RELEASE_DIST * scale
+        _gesture_thresh[...] = (click_px * click_px, release_px * release_px, (click_px * 1.2)**2, (click_px * 3)**2)
+
+        cond = gestures.conditions
+        cond[:3] = rise      # middle above PIP, middle above index, pinky raised
+        np.take(dist_sq, GESTURE_DIST_IDS, out=_gesture_dist)
+        np.less(_gesture_dist, _gesture_thresh, out=cond[3:])
+        gestures.update(timestamp)
+
+        is_dual_mode_active = gestures.is_active("dual")
+        config.dragging = gestures.is_active("pinch")
+        config.pinky_bent = bool(rise[R_PINKY])
+
+        # --- B. INDEX FINGER LOCATION ---
+        x3 = float(screen_pts[0, 0])
+        y3 = float(screen_pts[0, 1])
+        
+        clocX, clocY = filter_point(index_filter, x3, y3, timestamp)
+        config.plocX, config.plocY = clocX, clocY
+
+        # --- C. MIDDLE FINGER LOCATION (Conditional) ---
+        clocMidX, clocMidY = 0, 0
+        
+        if is_dual_mode_active:
+            mx3 = float(screen_pts[1, 0])
+            my3 = float(screen_pts[1, 1])
+            
+            if not mid_track_active:
+                middle_filter.reset(mx3, my3, timestamp)
+            
+            mid_track_active = True
+            
+            clocMidX, clocMidY = filter_point(middle_filter, mx3, my3, timestamp)
+            plocMidX, plocMidY = clocMidX, clocMidY
+        else:
+            mid_track_active = False
+
+        # --- E. EXECUTE ACTIONS ---
+        with profiler.span("actions.handle_input"):
+            actions.handle_input(
+                clocX, clocY,           
+                clocMidX, clocMidY,     
+                config.dragging,        
+                is_dual_mode_active, # <--- Now uses the Stabilized Boolean
+                timestamp
+            )
+
+        # --- VISUALS ---
+        if display_img is not None:
+            # Box
+            draw_x1 = int(max(0, min(w, x_min)))
+            draw_y1 = int(max(0, min(h, y_min)))
+            draw_x2 = int(max(0, min(w, x_max)))
+            draw_y2 = int(max(0, min(h, y_max)))
+            cv2.rectangle(display_img, (draw_x1, draw_y1), (draw_x2, draw_y2), (255, 255, 255), 2)
+
+            # Index
+            cv2.circle(display_img, (x_index_tip, y_index_tip), 8, (0, 255, 255), cv2.FILLED)
+            
+            # Middle (Only draw if active)
+            if is_dual_mode_active:
+                cv2.circle(display_img, (x_mid_tip, y_mid_tip), 8, (255, 0, 0), cv2.FILLED)
+
+            # Pinch Line
+            color = (0, 255, 0) if config.dragging else (0, 0, 255)
+            cv2.line(display_img, (x_thumb, y_thumb), (x_mid_pip, y_mid_pip), color, 2)
+            
+            if getattr(config, 'keyboard_triggered', False):
+                cv2.putText(display_img, "KEYBOARD", (x_mid_tip, y_mid_tip-20), cv2.FONT_HERSHEY_PLAIN, 1.5, (255,0,255), 2)
+
+    # --- NO HAND: gestures still run their release timers ---
+    if not config.hand_detected:
+        gestures.conditions[:] = False
+        gestures.update(timestamp)
+        is_dual_mode_active = gestures.is_active("dual")
+        config.dragging = gestures.is_active("pinch")
+
+    # --- VOICE (Held open by the gesture's off_ms) ---
+    config.voice_active_gesture = gestures.is_active("voice")
+    voice_state = (config.hand_detected, config.voice_active_gesture, gestures.is_active("voice_near"))
+    if voice_state != _voice_state:
+        # Edges only: the voice engine and the overlay sleep between them
+        _voice_state = voice_state
+        events.publish(events.GESTURE)
 
     if display_img is not None and config.voice_active_gesture:
          cv2.putText(display_img, "MIC ON", (50, 100), cv2.FONT_HERSHEY_PLAIN, 3, (0, 255, 255), 3)
@@ -231,10 +471,10 @@ def process_frame(img):
 
         if display_img is not None:
              cv2.putText(display_img, "NO HAND", (w//2 - 50, h - 30), cv2.FONT_HERSHEY_PLAIN, 2, (100, 100, 100), 2)
-             d_x1 = int(max(0, min(w, center_x - half_w)))
-             d_y1 = int(max(0, min(h, center_y - half_h)))
-             d_x2 = int(max(0, min(w, center_x + half_w)))
-             d_y2 = int(max(0, min(h, center_y + half_h)))
+             d_x1 = int(max(0, min(w, x_min)))
+             d_y1 = int(max(0, min(h, y_min)))
+             d_x2 = int(max(0, min(w, x_max)))
+             d_y2 = int(max(0, min(h, y_max)))
              cv2.rectangle(display_img, (d_x1, d_y1), (d_x2, d_y2), (255, 255, 255), 2)
 
     return display_img
\ No newline at end of file
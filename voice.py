@@ -1,13 +1,28 @@
 import threading
 import queue
+import bisect
+from collections import deque
 import time
 import numpy as np
 import sounddevice as sd
 import webrtcvad
-import pyautogui
 import config
+import profiler
+import text_output
 import gc
+import os
+import sys
+import gestures
+import events
 from faster_whisper import WhisperModel
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # faster-whisper < 1.1
+    BatchedInferencePipeline = None
+try:
+    import psutil
+except ImportError:  # Optional, only used for the memory budget
+    psutil = None
 
 # --- AUDIO CONFIGURATION ---
 SAMPLE_RATE = 16000
@@ -15,109 +30,814 @@ FRAME_DURATION_MS = 20
 FRAME_SIZE = int(SAMPLE_RATE * FRAME_DURATION_MS / 1000) # 320 samples
 SILENCE_TIMEOUT_MS = 900
 SILENCE_CHUNKS = int(SILENCE_TIMEOUT_MS / FRAME_DURATION_MS)
+RING_SECONDS = 120          # Audio ring length; queued utterances must be decoded within this
+MAX_UTTERANCE_S = 60        # Longer recordings are cut and handed to the decoder
+
+# --- STREAMING (config.VOICE_STREAMING) ---
+STREAM_STEP_MS = 500        # New audio between incremental decodes
+STREAM_OVERLAP_MS = 200     # Re-decoded audio before the last committed word (word boundary context)
+STREAM_MAX_WINDOW_S = 15.0  # Uncommitted audio after which words are forced out without agreement
+STREAM_PROMPT_CHARS = 200   # Committed text passed back as the decoder prompt
+
+# --- SPECULATIVE ENDPOINTING ---
+# After a short pause the utterance so far is decoded in the background; if the pause
+# runs on to the silence timeout that result is typed at once instead of decoding then.
+SPECULATE_AFTER_MS = 280
+SPECULATE_CHUNKS = int(SPECULATE_AFTER_MS / FRAME_DURATION_MS)
+
+# --- ENERGY PRE-GATE ---
+# Cheap NumPy pass over a block of frames in front of webrtcvad: frames near the adaptive
+# noise floor, or quiet frames with a hiss-like zero-crossing rate, skip the VAD entirely,
+# and recordings with too little voiced audio (clicks, breaths) never reach Whisper.
+PREGATE = True
+PREGATE_BLOCK = 5           # Frames analysed per pass (100 ms)
+PREGATE_RATIO = 2.0         # Frame RMS must exceed the noise floor by this factor (~6 dB)
+PREGATE_MIN_RMS = 60.0      # Absolute floor, int16 units (digital silence, muted mic)
+PREGATE_HISS_ZCR = 0.45     # Zero-crossing rate above which a quiet frame counts as hiss
+PREGATE_HISS_RATIO = 4.0    #   ... unless it is at least this far above the floor
+NOISE_ALPHA = 0.05          # Noise floor tracking speed on quiet frames
+NOISE_RISE = 1.002          # Floor creep per block without quiet frames (room got louder)
+MIN_VOICED_MS = 200         # Recordings with less VAD-positive audio are dropped
+
+# --- ADAPTIVE SILENCE TIMEOUT ---
+# The end-of-utterance timeout follows the user's own mid-sentence pauses:
+# their 95th percentile plus a margin, clamped to [SILENCE_MIN_MS, SILENCE_MAX_MS].
+ADAPTIVE_SILENCE = True
+SILENCE_MIN_MS = 500
+SILENCE_MAX_MS = 1500
+SILENCE_MARGIN_MS = 250
+PAUSE_MIN_MS = 100          # Shorter gaps are VAD flicker, not pauses
+PAUSE_HISTORY = 200
+PAUSE_MIN_SAMPLES = 10      # Pauses needed before the timeout adapts
 
 # --- AI CONFIGURATION ---
 MODEL_SIZE = "tiny.en"
 COMPUTE_TYPE = "int8"
+CPU_THREADS = 2             # Kept low so decoding doesn't starve the camera thread
+BEAM_SIZE = 5
+
+# --- MODEL LIFECYCLE ---
+LIFECYCLE_POLL_S = 0.25     # Re-check interval while voice is in use (otherwise it waits for events)
+LOAD_RETRY_S = 5.0          # A failed load is retried after this long
+WARMUP_SECONDS = 1.0        # Silent clip decoded once after load (first real decode is fast)
+MODEL_EST_MB = 250          # Footprint guess for the budget check until a load was measured
+BUDGET_GRACE_S = 15         # Over budget: unload after this long with no voice use (and re-check interval)
+
+# --- DECODE STAGE ---
+DECODE_QUEUE_SIZE = 16      # Pending utterance jobs; beyond this new ones are dropped
+DECODE_BATCH_MAX = 8        # Finished utterances decoded together when they pile up
+BATCH_MAX_SECONDS = 30.0    # Longer utterances are decoded on their own (one Whisper window)
+
+class AudioRing:
+    """
+    Fixed int16 ring written straight from the PortAudio callback (no queue, no bytes copies).
+    Positions are absolute sample counts: the VAD loop reads frame views at its own read
+    position, utterances are just [start, end) ranges, valid until the writer laps them.
+    """
+    def __init__(self, seconds):
+        self.capacity = int(seconds * SAMPLE_RATE) // FRAME_SIZE * FRAME_SIZE
+        self.data = np.zeros(self.capacity, dtype=np.int16)
+        self.write_pos = 0
+        self.overruns = 0             # Frames lost: reader fell a ring behind, or PortAudio overflow
+        self.ready = threading.Event()
+
+    def write(self, indata):
+        samples = np.frombuffer(indata, dtype=np.int16)
+        n = len(samples)
+        i = self.write_pos % self.capacity
+        first = min(n, self.capacity - i)
+        self.data[i:i + first] = samples[:first]
+        if first < n:
+            self.data[:n - first] = samples[first:]
+        self.write_pos += n
+        self.ready.set()
+
+    def frames(self, pos, count):
+        """count frames from pos as a (count, FRAME_SIZE) array: a view unless it wraps."""
+        i = pos % self.capacity
+        n = count * FRAME_SIZE
+        if i + n <= self.capacity:
+            return self.data[i:i + n].reshape(count, FRAME_SIZE)
+        return np.concatenate((self.data[i:], self.data[:i + n - self.capacity])).reshape(count, FRAME_SIZE)
+
+    def wait(self, pos, timeout):
+        """Blocks until a whole frame is available at pos."""
+        if self.write_pos - pos >= FRAME_SIZE:
+            return True
+        self.ready.clear()
+        if self.write_pos - pos >= FRAME_SIZE:
+            return True
+        self.ready.wait(timeout)
+        return self.write_pos - pos >= FRAME_SIZE
+
+    def valid(self, start):
+        return self.write_pos - start <= self.capacity
+
+    def to_float32(self, start, end, out):
+        """
+        Converts [start, end) to float32 [-1, 1] in out[:end - start], once.
+        Returns that view, or None if the writer already overwrote part of it.
+        """
+        n = end - start
+        if not self.valid(start):
+            return None
+        i = start % self.capacity
+        first = min(n, self.capacity - i)
+        np.multiply(self.data[i:i + first], _INT16_SCALE, out=out[:first])
+        if first < n:
+            np.multiply(self.data[:n - first], _INT16_SCALE, out=out[first:n])
+        # Lapped while converting: the copy is torn
+        if not self.valid(start):
+            return None
+        return out[:n]
+
+_INT16_SCALE = np.float32(1.0 / 32768.0)
 
 # --- GLOBALS ---
 model = None
-audio_queue = queue.Queue(maxsize=500) # Limit buffer to ~10 seconds of audio
+batched_model = None
+ring = AudioRing(RING_SECONDS)
+scratch = np.empty(ring.capacity, dtype=np.float32)   # Decoder-only float32 staging (reused)
 vad = webrtcvad.Vad(2) # Mode 2 = Balanced (Aggressive enough to filter breathing)
 
-def load_model():
-    global model
-    if model is None:
-        try:
-            print("[Voice] Loading Whisper Model...")
-            config.voice_status = "LOADING"
-            # Threads=1 prevents UI lag during heavy CPU math
-            model = WhisperModel(MODEL_SIZE, device="cpu", compute_type=COMPUTE_TYPE, cpu_threads=2)
-            print("[Voice] Model Ready.")
-            return True
-        except Exception as e:
-            print(f"[Voice] Load Error: {e}")
-            return False
-    return True
+# --- MODEL LIFECYCLE STATE ---
+# Only the lifecycle thread loads and unloads; the decoder holds model_lock while it
+# transcribes, so an idle unload never pulls the model out from under a running job.
+model_lock = threading.Lock()
+model_ready = threading.Event()
+WANT_NONE, WANT_HINT, WANT_DEMAND = 0, 1, 2
+last_used = 0.0                # perf_counter of the last demand or hint
+model_mb = 0.0                 # Measured RSS growth of the last load (0 = unknown)
+loads = 0
+unloads = 0
+load_failed_at = 0.0
+_last_demand = 0.0
+_prev_want = WANT_NONE
+LIFECYCLE_TOPICS = (events.RUN, events.VOICE, events.GESTURE)
+VOICE_SETTINGS = ("VOICE_ALWAYS_ON", "VOICE_PRELOAD", "VOICE_IDLE_UNLOAD_S", "VOICE_MEMORY_BUDGET_MB")
+threads = []
 
-def unload_model():
-    global model
+def process_rss_mb():
+    """Resident memory of this process in MB, or None when it can't be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1048576.0
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize / 1048576.0
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576.0
+    except (OSError, ValueError, IndexError):
+        return None
+
+def over_budget(extra_mb=0.0):
+    """True if RSS (+ extra_mb) exceeds config.VOICE_MEMORY_BUDGET_MB. Unknown RSS never is."""
+    if config.VOICE_MEMORY_BUDGET_MB <= 0:
+        return False
+    rss = process_rss_mb()
+    return rss is not None and rss + extra_mb > config.VOICE_MEMORY_BUDGET_MB
+
+def _set_timing(**values):
+    timing = dict(config.voice_model_timing)
+    timing.update(values)
+    config.voice_model_timing = timing     # Swapped whole, readers never see a half update
+
+def load_model():
+    """Loads Whisper and runs one warm-up decode (lifecycle thread)."""
+    global model, batched_model, model_mb, loads
     if model is not None:
-        del model
+        return True
+    try:
+        print("[Voice] Loading Whisper Model...")
+        config.voice_status = "LOADING"
+        rss_before = process_rss_mb()
+        t0 = time.perf_counter()
+        new_model = WhisperModel(MODEL_SIZE, device="cpu", compute_type=COMPUTE_TYPE, cpu_threads=CPU_THREADS)
+        t1 = time.perf_counter()
+
+        # Warm-up: the first transcribe pays for allocator and kernel setup, do it on silence
+        with profiler.span("voice.warmup"):
+            segments, info = new_model.transcribe(np.zeros(int(SAMPLE_RATE * WARMUP_SECONDS), dtype=np.float32),
+                                                  beam_size=BEAM_SIZE)
+            for _ in segments:
+                pass
+        t2 = time.perf_counter()
+
+        rss_after = process_rss_mb()
+        if rss_before is not None and rss_after is not None:
+            model_mb = max(rss_after - rss_before, 0.0)
+        with model_lock:
+            model = new_model
+            batched_model = BatchedInferencePipeline(model=model) if BatchedInferencePipeline is not None else None
+        loads += 1
+        _set_timing(load_ms=round((t1 - t0) * 1000.0, 1), warmup_ms=round((t2 - t1) * 1000.0, 1),
+                    model_mb=round(model_mb, 1), loads=loads, loaded=True)
+        model_ready.set()
+        events.publish(events.VOICE)
+        if config.voice_status == "LOADING":
+            config.voice_status = "IDLE"
+        print(f"[Voice] Model Ready. (load {(t1 - t0) * 1000:.0f} ms, warm-up {(t2 - t1) * 1000:.0f} ms)")
+        return True
+    except Exception as e:
+        print(f"[Voice] Load Error: {e}")
+        if config.voice_status == "LOADING":
+            config.voice_status = "IDLE"
+        return False
+
+def unload_model(reason=""):
+    global model, batched_model, unloads
+    if model is None:
+        return
+    model_ready.clear()
+    with model_lock:    # Waits for a running decode to finish
         model = None
-        gc.collect()
+        batched_model = None
+    events.publish(events.VOICE)
+    gc.collect()
+    unloads += 1
+    _set_timing(unloads=unloads, loaded=False)
+    print(f"[Voice] Model Unloaded{f' ({reason})' if reason else ''}.")
+    if config.voice_status != "LISTENING":
         config.voice_status = "IDLE"
 
+def wants_model():
+    """
+    WANT_DEMAND: speech is (or may right now be) captured or queued, the model is needed.
+    WANT_HINT: likely soon (a hand is in view, or it is closing in on the voice gesture).
+    """
+    if config.VOICE_ALWAYS_ON or config.voice_active_gesture or recording or backlog():
+        return WANT_DEMAND
+    if config.VOICE_PRELOAD and (gestures.is_active("voice_near")
+                                 or (config.running and getattr(config, 'hand_detected', False))):
+        return WANT_HINT
+    return WANT_NONE
+
+def _lifecycle_step(now):
+    """One load / unload decision. Returns seconds until the next timed check (None = events only)."""
+    global last_used, load_failed_at, _last_demand, _prev_want
+    if not config.voice_enabled:
+        _prev_want = WANT_NONE
+        if model is not None:
+            print(f"[Voice] Decode stats: {get_stats()}")
+            unload_model("voice disabled")
+        return None
+
+    want = wants_model()
+    if want == WANT_DEMAND:
+        last_used = _last_demand = now
+    elif want == WANT_HINT or _prev_want != WANT_NONE:
+        last_used = now         # Hint, or the moment demand / hint ended
+    _prev_want = want
+
+    if model is None:
+        if want == WANT_NONE:
+            return None
+        if now - load_failed_at < LOAD_RETRY_S:
+            return load_failed_at + LOAD_RETRY_S - now
+        if want == WANT_HINT and over_budget(model_mb or MODEL_EST_MB):
+            return BUDGET_GRACE_S
+        if not load_model():
+            load_failed_at = time.perf_counter()
+        last_used = time.perf_counter()
+        return 0
+
+    if want == WANT_DEMAND:
+        # Recording / queued audio end without an event of their own
+        return LIFECYCLE_POLL_S
+    if config.VOICE_IDLE_UNLOAD_S > 0 and now - last_used > config.VOICE_IDLE_UNLOAD_S:
+        unload_model(f"idle {config.VOICE_IDLE_UNLOAD_S}s")
+        return None
+    if now - _last_demand > BUDGET_GRACE_S and over_budget():
+        unload_model("over memory budget")
+        return None
+
+    # Sleep until the idle deadline or the next budget check
+    deadlines = []
+    if config.VOICE_IDLE_UNLOAD_S > 0:
+        deadlines.append(last_used + config.VOICE_IDLE_UNLOAD_S)
+    if config.VOICE_MEMORY_BUDGET_MB > 0:
+        grace_end = _last_demand + BUDGET_GRACE_S
+        deadlines.append(grace_end if grace_end >= now else now + BUDGET_GRACE_S)
+    return max(0.0, min(deadlines) - now) if deadlines else None
+
+def lifecycle_loop():
+    """
+    Owns the Whisper model: loads it on demand or ahead of time, unloads it when idle.
+    Preloading (a hint) respects the memory budget; real demand always loads.
+    Between decisions it blocks on the event bus (voice switch, gestures, start / stop)
+    or until its next deadline, so an idle engine costs no wake-ups.
+    """
+    while not events.shutting_down():
+        since = events.mark(LIFECYCLE_TOPICS)
+        timeout = _lifecycle_step(time.perf_counter())
+        if timeout != 0:
+            events.wait_change(LIFECYCLE_TOPICS, since, timeout)
+    unload_model("shutdown")
+
 def audio_callback(indata, frames, time, status):
     """
     Real-time audio callback. 
-    Must be lightning fast. Just puts data in the queue.
+    Must be lightning fast. Writes into the ring and never blocks.
     """
     if status:
+        if status.input_overflow:
+            ring.overruns += 1
         print(f"[Audio] Error: {status}")
-    # Copy data to queue
-    audio_queue.put(bytes(indata))
+    ring.write(indata)
 
-def transcribe_buffer(buffer_bytes):
-    """Run Whisper on the collected bytes"""
-    global model
-    
-    if not buffer_bytes or model is None: 
+# --- ENDPOINTING STATE ---
+pause_history = deque(maxlen=PAUSE_HISTORY)   # Mid-utterance pause lengths (ms)
+silence_chunks = SILENCE_CHUNKS               # Current end-of-utterance timeout, in frames
+speculation = None                            # Speculative job for the current pause
+_spec_running = None                          # Last queued speculative job (one decode at a time)
+spec_used = 0
+spec_discarded = 0
+
+# --- PRE-GATE STATE ---
+noise_floor = None                      # RMS of the room, int16 units
+_gate_work = np.empty((PREGATE_BLOCK, FRAME_SIZE), dtype=np.float32)
+_gate_sign = np.empty((PREGATE_BLOCK, FRAME_SIZE), dtype=bool)
+_gate_cross = np.empty((PREGATE_BLOCK, FRAME_SIZE - 1), dtype=bool)
+_gate_rms = np.empty(PREGATE_BLOCK, dtype=np.float32)
+_gate_zcr = np.empty(PREGATE_BLOCK, dtype=np.float32)
+_gate_loud = np.empty(PREGATE_BLOCK, dtype=bool)
+frames_gated = 0                        # Frames that skipped webrtcvad
+frames_vad = 0
+utterances_short = 0                    # Recordings dropped below MIN_VOICED_MS
+
+def pregate(block):
+    """
+    block: (n, FRAME_SIZE) int16 frames. Returns a bool view, True where a frame
+    might be speech and is worth a webrtcvad call. Also tracks the noise floor.
+    """
+    global noise_floor
+    n = len(block)
+    work, rms, zcr, loud = _gate_work[:n], _gate_rms[:n], _gate_zcr[:n], _gate_loud[:n]
+
+    # Zero-crossing rate per frame
+    np.signbit(block, out=_gate_sign[:n])
+    np.not_equal(_gate_sign[:n, 1:], _gate_sign[:n, :-1], out=_gate_cross[:n])
+    np.mean(_gate_cross[:n], axis=1, out=zcr)
+
+    # RMS per frame
+    np.copyto(work, block)
+    np.multiply(work, work, out=work)
+    np.mean(work, axis=1, out=rms)
+    np.sqrt(rms, out=rms)
+
+    if noise_floor is None:
+        noise_floor = max(float(np.median(rms)), PREGATE_MIN_RMS / PREGATE_RATIO)
+    threshold = max(noise_floor * PREGATE_RATIO, PREGATE_MIN_RMS)
+    np.greater(rms, threshold, out=loud)
+    # Quiet, noisy-looking frames (fans, breath hiss) are not worth a VAD call either
+    loud &= ~((zcr > PREGATE_HISS_ZCR) & (rms < noise_floor * PREGATE_HISS_RATIO))
+
+    quiet = rms < threshold
+    if quiet.any():
+        noise_floor += NOISE_ALPHA * (float(rms[quiet].mean()) - noise_floor)
+    else:
+        noise_floor *= NOISE_RISE
+    return loud
+
+def record_pause(chunks):
+    """A silence inside an utterance ended with more speech; adapt the timeout."""
+    global silence_chunks
+    pause_ms = chunks * FRAME_DURATION_MS
+    if pause_ms < PAUSE_MIN_MS:
         return
+    pause_history.append(pause_ms)
+    if ADAPTIVE_SILENCE and len(pause_history) >= PAUSE_MIN_SAMPLES:
+        timeout = np.percentile(pause_history, 95) + SILENCE_MARGIN_MS
+        timeout = min(max(timeout, SILENCE_MIN_MS), SILENCE_MAX_MS)
+        silence_chunks = int(timeout / FRAME_DURATION_MS)
+
+class AudioLost(Exception):
+    """The ring was overwritten before the decoder got to this audio."""
 
-    config.voice_status = "PROCESSING"
-    print(f"[Voice] Processing {len(buffer_bytes)/32000:.1f}s of audio...")
+def _load(start, end, offset=0):
+    """Ring range -> float32 view in the decoder scratch buffer (decoder thread only)."""
+    audio = ring.to_float32(start, end, scratch[offset:])
+    if audio is None:
+        raise AudioLost(f"{(end - start) / SAMPLE_RATE:.1f}s overwritten before decoding")
+    return audio
 
+def _norm(word):
+    return "".join(c for c in word.lower() if c.isalnum())
+
+class StreamState:
+    """
+    Incremental transcription of the utterance being recorded (local agreement).
+    Every STREAM_STEP_MS the audio after the last committed word is decoded again;
+    the leading words two consecutive hypotheses agree on are committed and typed,
+    so only the unconfirmed tail is ever re-decoded.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.committed_s = 0.0      # Utterance time up to which words are typed
+        self.committed_text = ""    # Typed so far in this utterance (decoder prompt)
+        self.hypothesis = []        # Last decode's unconfirmed words: (norm, text, start, end)
+        self.first_text_at = None   # perf_counter of the first typed word
+
+    def _decode_tail(self, start, end):
+        start_s = max(self.committed_s - STREAM_OVERLAP_MS / 1000.0, 0.0)
+        audio = _load(start + int(start_s * SAMPLE_RATE), end)
+        prompt = self.committed_text[-STREAM_PROMPT_CHARS:] or None
+        segments, info = model.transcribe(audio, beam_size=BEAM_SIZE, word_timestamps=True,
+                                          initial_prompt=prompt, condition_on_previous_text=False)
+        words = []
+        for seg in segments:
+            for w in seg.words or ():
+                w_end = start_s + w.end
+                # Overlap region: this word was already typed
+                if w_end <= self.committed_s + 0.05:
+                    continue
+                words.append((_norm(w.word), w.word, start_s + w.start, w_end))
+        return words
+
+    def _commit(self, words):
+        if not words:
+            return ""
+        text = "".join(w[1] for w in words)
+        if not self.committed_text:
+            text = text.lstrip()
+            self.first_text_at = time.perf_counter()
+        self.committed_text += text
+        self.committed_s = words[-1][3]
+        return text
+
+    def step(self, start, end):
+        """Decodes the unconfirmed tail of [start, end); returns the newly confirmed text ('' if none)."""
+        with profiler.span("voice.stream"):
+            words = self._decode_tail(start, end)
+        agreed = 0
+        for prev, cur in zip(self.hypothesis, words):
+            if prev[0] != cur[0]:
+                break
+            agreed += 1
+        # Long stretch with no agreement (noisy audio): force out all but the last two words
+        if agreed == 0 and (end - start) / SAMPLE_RATE - self.committed_s > STREAM_MAX_WINDOW_S:
+            agreed = max(len(words) - 2, 0)
+        self.hypothesis = words[agreed:]
+        return self._commit(words[:agreed])
+
+    def finish(self, start, end):
+        """End of utterance: decodes the tail once more and commits all of it."""
+        with profiler.span("voice.stream"):
+            words = self._decode_tail(start, end)
+        self.hypothesis = []
+        return self._commit(words)
+
+stream = StreamState()
+STREAM_STEP_SAMPLES = STREAM_STEP_MS * SAMPLE_RATE // 1000
+MAX_UTTERANCE_SAMPLES = MAX_UTTERANCE_S * SAMPLE_RATE
+
+# --- DECODE JOBS ---
+# The VAD loop (capture stage) only segments audio and queues jobs; decoder_loop
+# (decode stage) runs them in order on its own thread, so the microphone is drained
+# at full rate while Whisper works. Finished utterances that pile up are batched.
+JOB_FINAL = "final"            # Whole utterance: decode and type
+JOB_SPECULATE = "speculate"    # Utterance so far, at a short pause: decode and keep the text
+JOB_COMMIT = "commit"          # Silence timeout after a speculation: type the speculative text
+JOB_STREAM = "stream"          # Streaming: decode the unconfirmed tail, type what stabilized
+JOB_STREAM_END = "stream_end"  # Streaming: type the rest (start None = drop the utterance)
+
+class Job:
+    """Decode request for ring samples [start, end) of one utterance."""
+    __slots__ = ("kind", "start", "end", "spec", "queued_at", "text", "error", "cancelled", "done")
+    def __init__(self, kind, start, end, spec=None):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.spec = spec
+        self.queued_at = time.perf_counter()
+        self.text = None
+        self.error = None
+        self.cancelled = False
+        self.done = False
+
+decode_queue = queue.Queue(maxsize=DECODE_QUEUE_SIZE)
+_pending = deque()             # Jobs taken off decode_queue, waiting for this decode round
+recording = False              # Capture stage is inside an utterance (for voice_status)
+_stream_inflight = False       # One streaming job at a time, the next one waits for its result
+
+# --- DECODE METRICS ---
+jobs_done = 0
+jobs_dropped = 0
+batches = 0
+max_batch = 0
+max_backlog = 0
+audio_decoded_s = 0.0
+decode_time_s = 0.0
+last_rtf = 0.0                 # Decode time / audio time of the last decode (< 1 = faster than real time)
+last_wait_ms = 0.0             # Queue wait of the last job
+
+def submit_job(job):
+    """Capture stage -> decode stage. Never blocks the VAD loop."""
+    global jobs_dropped, max_backlog
     try:
-        # 1. Convert raw PCM bytes to Float32 array for Whisper
-        # Webrtcvad uses 16-bit int, Whisper uses 32-bit float [-1, 1]
-        audio_int16 = np.frombuffer(buffer_bytes, dtype=np.int16)
-        audio_float32 = audio_int16.astype(np.float32) / 32768.0
-
-        # 2. Transcribe
-        segments, info = model.transcribe(audio_float32, beam_size=5)
-        
+        decode_queue.put_nowait(job)
+    except queue.Full:
+        jobs_dropped += 1
+        print(f"[Voice] Decode queue full, dropped {job.kind} job")
+        return False
+    max_backlog = max(max_backlog, backlog())
+    if model is None:
+        events.publish(events.VOICE)    # Queued audio is demand: wake the lifecycle thread
+    return True
+
+def backlog():
+    return decode_queue.qsize() + len(_pending)
+
+def _account(samples, start):
+    global audio_decoded_s, decode_time_s, last_rtf
+    elapsed = time.perf_counter() - start
+    seconds = samples / SAMPLE_RATE
+    audio_decoded_s += seconds
+    decode_time_s += elapsed
+    last_rtf = elapsed / seconds if seconds > 0 else 0.0
+
+def _clean_text(text):
+    # --- SMART PUNCTUATION LOGIC ---
+    # If text is short (command-like) and ends with a period, remove it.
+    if len(text) < 25 and text.endswith("."):
+        text = text[:-1]
+    # -------------------------------
+    return text
+
+def decode_text(start, end):
+    """Run Whisper on ring samples [start, end), returns the cleaned-up text"""
+    t0 = time.perf_counter()
+    # 1. Convert the int16 ring slice to Float32 for Whisper, once, into the scratch buffer
+    # Webrtcvad uses 16-bit int, Whisper uses 32-bit float [-1, 1]
+    audio_float32 = _load(start, end)
+
+    # 2. Transcribe
+    # Segments are a lazy generator, so the decode happens while joining
+    with profiler.span("voice.transcribe"):
+        segments, info = model.transcribe(audio_float32, beam_size=BEAM_SIZE)
         text = " ".join([seg.text for seg in segments]).strip()
-        
-        # --- SMART PUNCTUATION LOGIC ---
-        # If text is short (command-like) and ends with a period, remove it.
-        if len(text) < 25 and text.endswith("."):
-            text = text[:-1]
-        # -------------------------------
-        
-        if text:
-            print(f"[Voice] TYPING: {text}")
-            pyautogui.write(text + " ")
-        else:
-            print("[Voice] (Silence/Noise ignored)")
+    _account(end - start, t0)
+    return _clean_text(text)
+
+def decode_batch(ranges):
+    """Decodes several utterances in one batched pass; returns their texts in order."""
+    if (batched_model is None or len(ranges) == 1
+            or max(e - s for s, e in ranges) > BATCH_MAX_SECONDS * SAMPLE_RATE):
+        return [decode_text(s, e) for s, e in ranges]
+
+    t0 = time.perf_counter()
+    # Utterances back to back in the scratch buffer, one clip each:
+    # every clip is one item of the same batch
+    clips, starts, offset = [], [], 0
+    for s, e in ranges:
+        _load(s, e, offset)
+        clips.append({"start": offset / SAMPLE_RATE, "end": (offset + e - s) / SAMPLE_RATE})
+        starts.append(offset / SAMPLE_RATE)
+        offset += e - s
+    audio = scratch[:offset]
+    texts = [[] for _ in ranges]
+    with profiler.span("voice.transcribe_batch"):
+        segments, info = batched_model.transcribe(audio, clip_timestamps=clips,
+                                                  batch_size=len(ranges), beam_size=BEAM_SIZE)
+        for seg in segments:
+            texts[max(bisect.bisect_right(starts, seg.start + 1e-3) - 1, 0)].append(seg.text)
+    _account(offset, t0)
+    return [_clean_text(" ".join(t).strip()) for t in texts]
+
+def emit_text(text):
+    if text:
+        print(f"[Voice] TYPING: {text}")
+        text_output.type_text(text + " ")
+    else:
+        print("[Voice] (Silence/Noise ignored)")
 
+def _run_finals(jobs):
+    global batches, max_batch
+    total = sum(j.end - j.start for j in jobs)
+    print(f"[Voice] Processing {total/SAMPLE_RATE:.1f}s of audio ({len(jobs)} utterance(s))...")
+    try:
+        texts = decode_batch([(j.start, j.end) for j in jobs])
     except Exception as e:
         print(f"[Voice] Transcribe Error: {e}")
-    
-    config.voice_status = "IDLE"
+        return
+    if len(jobs) > 1:
+        batches += 1
+        max_batch = max(max_batch, len(jobs))
+    for text in texts:
+        emit_text(text)
+
+def _run_stream(job):
+    global _stream_inflight
+    try:
+        if job.kind == JOB_STREAM:
+            start = time.perf_counter()
+            committed = int(stream.committed_s * SAMPLE_RATE)
+            text = stream.step(job.start, job.end)
+            _account(job.end - job.start - committed, start)
+            if text:
+                print(f"[Voice] TYPING (partial): {text}")
+                text_output.type_text(text)
+            return
+        if job.start is None:
+            stream.reset()
+            return
+        tail = stream.finish(job.start, job.end)
+        # Same smart punctuation as the whole-utterance path, when the utterance was short
+        if len(stream.committed_text) < 25 and tail.endswith("."):
+            tail = tail[:-1]
+        if stream.committed_text:
+            print(f"[Voice] TYPING: {tail}")
+            text_output.type_text(tail + " ")
+        else:
+            print("[Voice] (Silence/Noise ignored)")
+        stream.reset()
+    except Exception as e:
+        print(f"[Voice] Stream Decode Error: {e}")
+        if job.kind == JOB_STREAM_END:
+            stream.reset()
+    finally:
+        if job.kind == JOB_STREAM:
+            _stream_inflight = False
+
+def _run_job(job):
+    global spec_used
+    if job.kind == JOB_SPECULATE:
+        # Discarded before it reached the decoder: skip the decode entirely
+        if not job.cancelled:
+            try:
+                job.text = decode_text(job.start, job.end)
+            except Exception as e:
+                job.error = e
+    elif job.kind == JOB_COMMIT:
+        spec = job.spec
+        if spec.text is None:
+            print(f"[Voice] Speculative decode failed ({spec.error}), decoding again")
+            _run_finals([job])
+        else:
+            spec_used += 1
+            print(f"[Voice] Speculative result ({(spec.end - spec.start)/SAMPLE_RATE:.1f}s, decoded during the pause)")
+            emit_text(spec.text)
+    else:
+        _run_stream(job)
+    job.done = True
+
+def _skip_job(job):
+    """Drops a job without decoding it (model gone), keeping the streaming state consistent."""
+    global _stream_inflight
+    if job.kind == JOB_STREAM:
+        _stream_inflight = False
+    elif job.kind == JOB_STREAM_END:
+        stream.reset()
+    job.done = True
+
+def decoder_loop():
+    """Decode stage: runs utterance jobs in order, batching finished utterances."""
+    global jobs_done, last_wait_ms
+    while not events.shutting_down():
+        if not _pending:
+            job = decode_queue.get()
+            if job is None:     # Shutdown sentinel
+                break
+            _pending.append(job)
+        # Everything already waiting joins this round, which is what gets batched
+        while True:
+            try:
+                job = decode_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                _pending.append(job)
+
+        # The lifecycle thread loads the model for queued jobs (audio waits in the ring).
+        # The job stays in _pending meanwhile, so backlog() keeps demanding (and retrying) the load
+        events.wait(lambda: model is not None or not config.voice_enabled)
+        job = _pending.popleft()
+        last_wait_ms = (time.perf_counter() - job.queued_at) * 1000.0
+        if model is None:
+            # Voice engine switched off while jobs were queued
+            _skip_job(job)
+            continue
+        if job.kind in (JOB_FINAL, JOB_COMMIT, JOB_STREAM_END):
+            config.voice_status = "PROCESSING"
+
+        if job.kind == JOB_FINAL:
+            jobs = [job]
+            total = job.end - job.start
+            # Batch limited by count and by what fits in the scratch buffer
+            while (_pending and _pending[0].kind == JOB_FINAL and len(jobs) < DECODE_BATCH_MAX
+                   and total + _pending[0].end - _pending[0].start <= len(scratch)):
+                total += _pending[0].end - _pending[0].start
+                jobs.append(_pending.popleft())
+            with model_lock:
+                # Re-checked under the lock: an unload may have landed since the wait
+                if model is None:
+                    for j in jobs:
+                        _skip_job(j)
+                else:
+                    _run_finals(jobs)
+                    for j in jobs:
+                        j.done = True
+                    jobs_done += len(jobs)
+        else:
+            with model_lock:
+                if model is None:
+                    _skip_job(job)
+                else:
+                    _run_job(job)
+                    jobs_done += 1
+
+        if not _pending and decode_queue.empty():
+            config.voice_status = "LISTENING" if recording else "IDLE"
+
+def get_stats():
+    return {
+        "backlog": backlog(),
+        "max_backlog": max_backlog,
+        "jobs": jobs_done,
+        "dropped": jobs_dropped,
+        "batches": batches,
+        "max_batch": max_batch,
+        "last_wait_ms": round(last_wait_ms, 1),
+        "last_rtf": round(last_rtf, 3),
+        "rtf": round(decode_time_s / audio_decoded_s, 3) if audio_decoded_s else 0.0,
+        "audio_s": round(audio_decoded_s, 1),
+        "speculative_used": spec_used,
+        "speculative_discarded": spec_discarded,
+        "audio_overruns": ring.overruns,
+        "vad_frames": frames_vad,
+        "gated_frames": frames_gated,
+        "short_dropped": utterances_short,
+        "noise_floor": round(noise_floor or 0.0, 1),
+    }
+
+def start_speculation(start, end):
+    global speculation, _spec_running
+    # Never stack decodes: a discarded speculation may still be on the decoder
+    if _spec_running is not None and not _spec_running.done:
+        return
+    job = Job(JOB_SPECULATE, start, end)
+    if submit_job(job):
+        speculation = _spec_running = job
+
+def discard_speculation():
+    """Speech resumed (or listening stopped): the snapshot is no longer the whole utterance."""
+    global speculation, spec_discarded
+    if speculation is not None:
+        speculation.cancelled = True
+        speculation = None
+        spec_discarded += 1
+
+def end_utterance(start, end):
+    """Silence timeout: hand the finished utterance to the decode stage."""
+    global speculation
+    if config.VOICE_STREAMING:
+        submit_job(Job(JOB_STREAM_END, start, end))
+    elif speculation is not None:
+        # Only non-speech was added since the snapshot: its text is the answer.
+        # The full range rides along in case the speculative decode failed.
+        submit_job(Job(JOB_COMMIT, start, end, spec=speculation))
+        speculation = None
+    else:
+        submit_job(Job(JOB_FINAL, start, end))
+
+def drop_utterance():
+    """Listening stopped mid-utterance."""
+    discard_speculation()
+    if config.VOICE_STREAMING:
+        submit_job(Job(JOB_STREAM_END, None, None))
 
 def processing_loop():
-    """Main logic thread: VAD State Machine"""
+    """Capture stage: VAD State Machine (decoding happens in decoder_loop)"""
+    global recording, _stream_inflight, frames_gated, frames_vad, utterances_short
     
     # State variables
     triggered = False
     silence_counter = 0
-    buffer = bytearray()
+    voiced_frames = 0       # VAD-positive frames in the current recording
+    utterance_start = 0     # Ring position of the utterance's first frame
+    stream_sent = 0         # Ring position covered by the last streaming job
     
-    while True:
-        # A. Master Switch Check
+    while not events.shutting_down():
+        # A. Master Switch Check (the model itself is handled by lifecycle_loop)
         if not config.voice_enabled:
-            if model is not None: unload_model()
-            time.sleep(0.5)
+            events.wait(lambda: config.voice_enabled)
             continue
-        
-        # B. Load Model if needed
-        if model is None:
-            if not load_model():
-                time.sleep(5)
-                continue
 
-        # C. Start Microphone Stream
+        # B. Start Microphone Stream
         # We open the stream and keep it open as long as voice is enabled
         try:
             with sd.RawInputStream(samplerate=SAMPLE_RATE, 
@@ -127,61 +847,133 @@ def processing_loop():
                                    callback=audio_callback):
                 
                 print("[Voice] Stream Started. Waiting for trigger...")
+                read_pos = ring.write_pos
                 
-                while config.voice_enabled:
-                    # 1. Get audio frame (blocking wait)
-                    try:
-                        frame = audio_queue.get(timeout=1.0)
-                    except queue.Empty:
+                while config.voice_enabled and not events.shutting_down():
+                    # 1. Get audio (blocking wait on the ring; voice / shutdown events wake it too)
+                    if not ring.wait(read_pos, 1.0):
                         continue
-                    
-                    # 2. TRIGGER GATE (The Logic Change)
-                    # We listen if:
-                    # A. The Camera sees the gesture (Thumb+Pinky)
-                    # B. OR The "Always On" checkbox is checked
-                    should_listen = config.voice_active_gesture or config.VOICE_ALWAYS_ON
-
-                    if not should_listen:
-                        # If we shouldn't be listening, reset any active recording
+                    if not ring.valid(read_pos):
+                        # Fell a whole ring behind: skip to the newest audio and drop the utterance
+                        lost = (ring.write_pos - read_pos) // FRAME_SIZE
+                        ring.overruns += lost
+                        print(f"[Voice] Audio overrun, skipped {lost} frames")
+                        read_pos = ring.write_pos - ring.write_pos % FRAME_SIZE
                         if triggered:
-                            buffer.clear()
-                            triggered = False
-                            config.voice_status = "IDLE"
+                            drop_utterance()
+                            triggered = recording = False
                         continue
+                    count = min((ring.write_pos - read_pos) // FRAME_SIZE, PREGATE_BLOCK)
+                    block = ring.frames(read_pos, count)
+
+                    # Energy pre-gate over the whole block at once
+                    loud = pregate(block) if PREGATE else None
 
-                    # 3. VAD Check (Is anyone actually speaking?)
-                    is_speech = vad.is_speech(frame, SAMPLE_RATE)
-
-                    if not triggered:
-                        if is_speech:
-                            print("[Voice] Speech Detected -> Recording")
-                            triggered = True
-                            config.voice_status = "LISTENING"
-                            buffer.extend(frame)
-                            silence_counter = 0
-                    else:
-                        # We are currently recording an utterance
-                        buffer.extend(frame)
+                    for k in range(count):
+                        frame = block[k]
+                        read_pos += FRAME_SIZE
                         
-                        if is_speech:
-                            silence_counter = 0
+                        # 2. TRIGGER GATE (The Logic Change)
+                        # We listen if:
+                        # A. The Camera sees the gesture (Thumb+Pinky)
+                        # B. OR The "Always On" checkbox is checked
+                        should_listen = config.voice_active_gesture or config.VOICE_ALWAYS_ON
+
+                        if not should_listen:
+                            # If we shouldn't be listening, reset any active recording
+                            if triggered:
+                                drop_utterance()
+                                triggered = recording = False
+                                if backlog() == 0:
+                                    config.voice_status = "IDLE"
+                            continue
+
+                        # 3. VAD Check (Is anyone actually speaking?)
+                        if loud is not None and not loud[k]:
+                            # Clear silence by energy alone, no VAD call
+                            is_speech = False
+                            frames_gated += 1
+                        else:
+                            with profiler.span("voice.vad"):
+                                is_speech = vad.is_speech(frame, SAMPLE_RATE)
+                            frames_vad += 1
+
+                        if not triggered:
+                            if is_speech:
+                                print("[Voice] Speech Detected -> Recording")
+                                triggered = recording = True
+                                config.voice_status = "LISTENING"
+                                utterance_start = stream_sent = read_pos - FRAME_SIZE
+                                silence_counter = 0
+                                voiced_frames = 1
                         else:
-                            silence_counter += 1
-
-                        # 4. End of Utterance Check
-                        if silence_counter > SILENCE_CHUNKS:
-                            # 900ms of silence detected. Finish.
-                            transcribe_buffer(bytes(buffer))
-                            
-                            # Reset
-                            buffer.clear()
-                            triggered = False
-                            silence_counter = 0
+                            # We are currently recording an utterance (the ring holds it)
+                            if is_speech:
+                                voiced_frames += 1
+                                if silence_counter:
+                                    record_pause(silence_counter)
+                                    discard_speculation()
+                                silence_counter = 0
+                            else:
+                                silence_counter += 1
+                                # Short pause: start decoding what we have in the background
+                                if (silence_counter == SPECULATE_CHUNKS and not config.VOICE_STREAMING
+                                        and voiced_frames * FRAME_DURATION_MS >= MIN_VOICED_MS):
+                                    start_speculation(utterance_start, read_pos)
+
+                            # 4. End of Utterance Check
+                            # Silence timeout (adaptive, 900ms by default), or the utterance got too long
+                            if (silence_counter > silence_chunks
+                                    or read_pos - utterance_start >= MAX_UTTERANCE_SAMPLES):
+                                if voiced_frames * FRAME_DURATION_MS < MIN_VOICED_MS:
+                                    # A click or a breath: not worth a Whisper run
+                                    utterances_short += 1
+                                    print(f"[Voice] (Too short, {voiced_frames * FRAME_DURATION_MS} ms voiced, ignored)")
+                                    drop_utterance()
+                                    if backlog() == 0:
+                                        config.voice_status = "IDLE"
+                                else:
+                                    end_utterance(utterance_start, read_pos)
+                                    config.voice_status = "PROCESSING"
+                                
+                                # Reset
+                                triggered = recording = False
+                                silence_counter = 0
+
+                            # 5. Streaming: re-decode the unconfirmed tail every STREAM_STEP_MS
+                            elif (config.VOICE_STREAMING and not _stream_inflight
+                                  and read_pos - stream_sent >= STREAM_STEP_SAMPLES):
+                                stream_sent = read_pos
+                                _stream_inflight = True
+                                if not submit_job(Job(JOB_STREAM, utterance_start, read_pos)):
+                                    _stream_inflight = False
 
         except Exception as e:
             print(f"[Voice] Stream Error: {e}")
-            time.sleep(1)
+            events.shutdown.wait(1)
 
 def start_voice_thread():
-    t = threading.Thread(target=processing_loop, daemon=True)
-    t.start()
\ No newline at end of file
+    for target, name in ((processing_loop, "VoiceCapture"), (decoder_loop, "VoiceDecoder"),
+                         (lifecycle_loop, "VoiceModel")):
+        t = threading.Thread(target=target, name=name, daemon=True)
+        t.start()
+        threads.append(t)
+
+def stop_voice_threads(timeout=2.0):
+    """
+    App exit, after events.request_shutdown(): capture closes the mic, the decoder drops
+    whatever is still queued, the lifecycle thread unloads the model.
+    """
+    try:
+        decode_queue.put_nowait(None)
+    except queue.Full:
+        pass    # The decoder is busy and checks for shutdown before its next job
+    deadline = time.perf_counter() + timeout
+    for t in threads:
+        t.join(max(0.0, deadline - time.perf_counter()))
+    del threads[:]
+
+# Wake the capture loop out of its ring wait on a voice switch or shutdown
+events.subscribe(events.VOICE, ring.ready.set)
+events.subscribe(events.SHUTDOWN, ring.ready.set)
+config.subscribe(lambda changed: events.publish(events.VOICE), VOICE_SETTINGS)